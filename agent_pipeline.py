@@ -0,0 +1,289 @@
+"""
+The app generation agent pipeline, shared by app_generator.py (CLI) and
+app_generator_wrapper.py (Streamlit GUI).
+
+    prd -> ui -> implementation -> validation -> auto_fix
+                                -> qa         ->
+
+Validation and QA only read the implementation, so they run concurrently. They and
+the stages that edit the app (implementation, auto fix) run each attempt in a write
+transaction of their own workspace, so a failed or aborted attempt never leaves ui/
+half-updated. Tools that read the project from disk (DIRECT_IO_TOOLS) get the
+writes staged so far committed before each call. The PRD and UI stages create the
+project and copy the template with such tools, so they write straight to disk. Auto
+fix runs when the QA report says fixes are needed. The UI and implementation stages
+are restored from the stage cache when the spec, template and prompts are unchanged.
+
+Runs given the user's requirements text are checkpointed per project, so running
+the same requirements again resumes at the first stage that is not up to date.
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from generation_state import hash_text
+from pipeline import Pipeline, Stage, StageResult, format_timings
+from pipeline_checkpoint import find_checkpointed_project
+
+AGENT_PROMPTS = ("prd_agent", "ui_agent", "implementation_agent", "validation_agent", "qa_agent", "auto_fix_agent")
+# Tools that read or write project files directly instead of through the file tools
+DIRECT_IO_TOOLS = (
+    "build_app_spec_from_docs", "copy_template_to_ui_folder", "generate_ui_structure_json", "read_ui_structure_json",
+    "validate_implementation", "read_project_requirements", "generate_vanilla_js_code",
+)
+
+
+# Models are created on first use and shared by every stage that uses them
+@lru_cache(maxsize=None)
+def gpt5_model():
+    from smolagents.models import OpenAIServerModel
+    return OpenAIServerModel('gpt-5')
+
+
+@lru_cache(maxsize=None)
+def gemini_pro_model():
+    from smolagents.models import LiteLLMModel
+    return LiteLLMModel(
+        model_id="gemini/gemini-2.5-pro",
+        api_key=os.environ.get("GEMINI_API_KEY"),
+        max_retries=3
+    )
+
+
+@lru_cache(maxsize=None)
+def gemini_3_pro_model():
+    from smolagents.models import LiteLLMModel
+    return LiteLLMModel(
+        model_id="gemini/gemini-3-pro-preview",
+        api_key=os.environ.get("GEMINI_API_KEY"),
+        max_retries=3
+    )
+
+
+# Stage name -> model factory, unless the caller overrides it
+DEFAULT_MODELS = {
+    "prd": gpt5_model,
+    "ui": gpt5_model,
+    "implementation": gemini_3_pro_model,
+    "validation": gpt5_model,
+    "qa": gemini_pro_model,
+    "auto_fix": gemini_pro_model,
+}
+
+
+def build_agent_pipeline(requirements_tool, models: Optional[dict[str, Callable[[], Any]]] = None) -> Pipeline:
+    """
+    Define the six agent stages.
+
+    Args:
+        requirements_tool: Tool the PRD, QA and auto fix agents use to get the user's requirements
+        models: Stage name -> model factory, overriding DEFAULT_MODELS
+
+    Returns:
+        The pipeline
+    """
+    from smolagents import CodeAgent, ToolCallingAgent
+    from am_tools import (
+        list_files, write_file, replace_in_file, mkdir, read_file, read_many_files, search_code, build_app_spec_from_docs,
+        validate_implementation, read_project_requirements, generate_ui_structure_json, read_ui_structure_json,
+        set_app_name, set_current_project, list_existing_projects, get_current_project, get_app_name, get_prd_path,
+        get_spec_path, get_template_path, get_ui_design_path, get_app_folder_path, set_ui_memory, get_ui_memory,
+        get_all_ui_memory, copy_template_to_ui_folder, generate_vanilla_js_code
+    )
+
+    models = {**DEFAULT_MODELS, **(models or {})}
+    project_tools = [set_current_project, list_existing_projects, get_current_project]
+
+    return Pipeline([
+        Stage(
+            name="prd",
+            label="PRD Agent",
+            prompt="prd_agent",
+            agent_type=ToolCallingAgent,
+            model=models["prd"],
+            tools=[mkdir, requirements_tool, write_file, set_app_name, get_app_name, get_prd_path, get_spec_path,
+                   build_app_spec_from_docs],
+            outputs=("PRD.md", "app_spec.json"),
+        ),
+        Stage(
+            name="ui",
+            label="UI Agent",
+            prompt="ui_agent",
+            agent_type=CodeAgent,
+            model=models["ui"],
+            tools=[mkdir, list_files, read_file, write_file, get_app_name, get_prd_path, get_spec_path,
+                   get_template_path, get_ui_design_path, copy_template_to_ui_folder, set_ui_memory, get_ui_memory,
+                   get_all_ui_memory, *project_tools, generate_ui_structure_json],
+            depends_on=("prd",),
+            inputs=("PRD.md", "app_spec.json"),
+            outputs=("ui/index.html", "ui/UI_STRUCTURE.json"),
+            agent_options={"additional_authorized_imports": ['json']},
+            cacheable=True,
+        ),
+        Stage(
+            name="implementation",
+            label="Implementation Agent",
+            prompt="implementation_agent",
+            agent_type=CodeAgent,
+            model=models["implementation"],
+            tools=[read_file, read_many_files, search_code, write_file, replace_in_file, mkdir, list_files,
+                   get_app_name, get_prd_path, get_spec_path, get_app_folder_path, *project_tools,
+                   read_ui_structure_json, generate_ui_structure_json],
+            depends_on=("ui",),
+            inputs=("PRD.md", "app_spec.json", "ui/UI_STRUCTURE.json"),
+            outputs=("implementation_plan.md",),
+            agent_options={"additional_authorized_imports": ['json'], "max_steps": 30},
+            transactional=True,
+            direct_io_tools=DIRECT_IO_TOOLS,
+            cacheable=True,
+            prepare=_prepare_implementation,
+        ),
+        Stage(
+            name="validation",
+            label="Validation Agent",
+            prompt="validation_agent",
+            agent_type=ToolCallingAgent,
+            model=models["validation"],
+            tools=[read_file, write_file, list_files, get_app_name, get_app_folder_path, *project_tools,
+                   validate_implementation],
+            depends_on=("implementation",),
+            inputs=("ui",),
+            # limit steps to prevent token overflow
+            agent_options={"max_steps": 10},
+            # Isolated so it can run next to QA
+            transactional=True,
+            direct_io_tools=DIRECT_IO_TOOLS,
+        ),
+        Stage(
+            name="qa",
+            label="QA Agent",
+            prompt="qa_agent",
+            agent_type=ToolCallingAgent,
+            model=models["qa"],
+            tools=[read_file, read_many_files, search_code, write_file, list_files, requirements_tool, get_app_name,
+                   get_prd_path, get_spec_path, get_ui_design_path, get_app_folder_path, *project_tools,
+                   read_ui_structure_json, validate_implementation, read_project_requirements],
+            depends_on=("implementation",),
+            inputs=("PRD.md", "ui"),
+            outputs=("code_prototype_test_report.md",),
+            # Isolated so it can run next to validation
+            transactional=True,
+            direct_io_tools=DIRECT_IO_TOOLS,
+        ),
+        Stage(
+            name="auto_fix",
+            label="Auto Fix Agent",
+            prompt="auto_fix_agent",
+            agent_type=CodeAgent,
+            model=models["auto_fix"],
+            tools=[read_file, read_many_files, search_code, write_file, replace_in_file, list_files, mkdir,
+                   requirements_tool, get_app_name, get_prd_path, get_spec_path, get_ui_design_path,
+                   get_app_folder_path, *project_tools, read_ui_structure_json, validate_implementation,
+                   read_project_requirements, generate_vanilla_js_code],
+            # After validation too, so fixes never race with the validation agent's reads
+            depends_on=("validation", "qa"),
+            inputs=("code_prototype_test_report.md", "ui"),
+            outputs=("auto_fix_report.md",),
+            # Increased steps for more thorough fixing
+            agent_options={"max_steps": 30},
+            transactional=True,
+            direct_io_tools=DIRECT_IO_TOOLS,
+            condition=_fixes_needed,
+        ),
+    ])
+
+
+def run_agent_pipeline(
+    requirements_tool,
+    models: Optional[dict[str, Callable[[], Any]]] = None,
+    use_stage_cache: bool = True,
+    requirements: Optional[str] = None,
+) -> dict[str, StageResult]:
+    """
+    Run the whole agent pipeline for the current project and print its timings.
+
+    Args:
+        requirements_tool: Tool the agents use to get the user's requirements
+        models: Stage name -> model factory, overriding DEFAULT_MODELS
+        use_stage_cache: Restore unchanged UI and implementation output from the stage cache
+        requirements: The user's requirements, if known up front. Enables checkpointing and resumes
+            the project a previous run with the same requirements left unfinished.
+
+    Returns:
+        Stage name -> StageResult
+    """
+    from am_tools import agent_state
+    from workspace import CurrentDirectoryWorkspace
+    from prompt_loader import prompt_loader
+    from stage_cache import get_stage_cache, run_fingerprint
+
+    def cache_key():
+        # Identify this run (spec + template + prompts) so stage outputs can be reused
+        stage_prompts = {name: prompt_loader.load_agent_prompt(name) for name in AGENT_PROMPTS}
+        return run_fingerprint(Path(agent_state.get_app_folder_path()) / "app_spec.json", stage_prompts)
+
+    run_inputs = None
+    if requirements is not None:
+        run_inputs = {"requirements": hash_text(requirements.strip())}
+        previous_project = find_checkpointed_project(agent_state.base_path, run_inputs)
+        if previous_project is not None:
+            agent_state.set_current_project(previous_project.name)
+            print(f"Resuming project: {previous_project.name}")
+
+    pipeline = build_agent_pipeline(requirements_tool, models)
+    results = pipeline.run(
+        prompt_loader.load_agent_prompt,
+        workspace=CurrentDirectoryWorkspace,
+        project_dir=agent_state.get_app_folder_path,
+        stage_cache=get_stage_cache() if use_stage_cache else None,
+        cache_key=cache_key,
+        run_inputs=run_inputs,
+    )
+    print(format_timings(results, pipeline.seconds))
+    return results
+
+
+def _prepare_implementation():
+    """Make sure a project is selected and its UI_STRUCTURE.json exists."""
+    from am_tools import agent_state, generate_ui_structure_json
+
+    current_project = agent_state.get_current_project()
+    if not current_project:
+        print("No current project set. Auto-selecting...")
+        projects = []
+        if agent_state.base_path.exists():
+            for item in agent_state.base_path.iterdir():
+                if item.is_dir():
+                    projects.append(item.name)
+        if not projects:
+            raise RuntimeError("No projects found. Please run PRD and UI agents first.")
+        agent_state.set_current_project(projects[0])
+        current_project = projects[0]
+        print(f"Auto-selected project: {projects[0]}")
+
+    print(f"Implementation Agent working on project: {current_project}")
+
+    ui_folder_path = f"{agent_state.get_app_folder_path()}/ui"
+    ui_structure_file = f"{ui_folder_path}/UI_STRUCTURE.json"
+    print(f"Checking for UI_STRUCTURE.json at: {ui_structure_file}")
+    if not os.path.exists(ui_structure_file):
+        print("UI_STRUCTURE.json missing. Generating it now...")
+        try:
+            result = generate_ui_structure_json(ui_folder_path)
+            print(f"Generated UI_STRUCTURE.json: {result}")
+        except Exception as e:
+            print(f"Failed to generate UI_STRUCTURE.json: {e}")
+            print("Continuing anyway...")
+    else:
+        print("UI_STRUCTURE.json exists")
+
+
+def _fixes_needed() -> bool:
+    """Run the auto fix stage only if the QA report says fixes are needed."""
+    from am_tools import analyze_qa_report_for_fixes_needed
+
+    print("Analyzing QA test report to determine if fixes are needed...")
+    fixes_analysis = analyze_qa_report_for_fixes_needed()
+    print(f"Analysis Result: {fixes_analysis}")
+    return fixes_analysis.startswith("YES")
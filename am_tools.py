@@ -1,174 +1,200 @@
-import os
-from pathlib import Path
 from typing import Optional
 from smolagents import tool
+from tool_metrics import instrument_tool
+from workspace import CurrentDirectoryWorkspace, Workspace
 
-@tool
-# Reads and returns the content of a file in the current directory or subdirectories.
-def read_file(filepath: str) -> str:
-    """
-    Reads the content of a file in the current directory or subdirectories.
-
-    Args:
-        filepath: Path to the file relative to current directory (e.g., 'data.txt' or 'folder/data.txt')
 
-    Returns:
-        The content of the file as a string
-    """
-    # Resolve the path and ensure it's within current directory
-    # Get current working directory
-    current_dir = Path.cwd()
-    # Convert the filepath to an absolute path, normalizing it to prevent directory traversal attacks
-    target_path = (current_dir / filepath).resolve()
-
-    # 小提示（改进点）：用字符串的 startswith 有边界问题，比如："/home/me/project2" 会被认为以 "/home/me/project" 开头（其实并不在同一目录树下）。
-    # Security check: ensure the resolved path is within current directory
-    # Check if the resolved path starts with the current directory path, preventing access to files outside the current directory
-    if not str(target_path).startswith(str(current_dir)):
-        raise ValueError(f"Access denied: Path '{filepath}' is outside current directory")
-
-    # Existing check: Check if the file exists
-    if not target_path.exists():
-        raise FileNotFoundError(f"File not found: {filepath}")
-
-    # Type check: check if the path is a file
-    if not target_path.is_file():
-        raise ValueError(f"Path is not a file: {filepath}")
-
-    # Read the file content (Read only if the file exists and is a regular file)
-    with open(target_path, 'r', encoding='utf-8') as f:
-        return f.read()
-
-
-@tool
-# 将内容写入文件，可以选择覆盖写入或追加
-# Writes or appends content to a file in the current directory or subdirectories.
-def write_file(filepath: str, content: str, mode: Optional[str] = 'w') -> str:
+def make_file_tools(workspace: Workspace) -> list:
     """
-    Writes content to a file in the current directory or subdirectories.
-    Creates parent directories if they don't exist.
-
-    Args:
-        filepath: Path to the file relative to current directory (e.g., 'output.txt' or 'results/output.txt')
-        content: The content to write to the file
-        mode: Write mode - 'w' for overwrite (default) or 'a' for append
-
-    Returns:
-        Success message with the file path
-    """
-    # Only allow 'w' (write/overwrite) or 'a' (append) modes
-    if mode not in ['w', 'a']:
-        raise ValueError("Mode must be 'w' (write/overwrite) or 'a' (append)")
-
-    # Resolve the path and ensure it's within current directory
-    current_dir = Path.cwd()
-    target_path = (current_dir / filepath).resolve() # Absolute path
+    Create the file tools bound to one workspace.
 
-    # Security check: ensure the resolved path is within current directory
-    if not str(target_path).startswith(str(current_dir)):
-        raise ValueError(f"Access denied: Path '{filepath}' is outside current directory")
-
-    # Create parent directories if they don't exist
-    # 在保存文件前，自动把存放它的各级文件夹都建好，而且不怕重复建。
-    # 这行代码本身并不知道你要存放哪个文件。它是通过 target_path 变量知道了文件的最终绝对路径，然后通过 .parent 反向推导出这个文件需要被存放在哪个文件夹里，最后再执行创建文件夹的命令。
-    target_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Write the content to the file
-    with open(target_path, mode, encoding='utf-8') as f:
-        f.write(content)
-
-    action = "written to" if mode == 'w' else "appended to"
-    return f"Successfully {action} file: {filepath}"
-
-
-@tool
-# 列出某个目录下的文件，可以使用通配符模式筛选
-def list_files(directory: Optional[str] = '.', pattern: Optional[str] = '*') -> str:
-    """
-    Lists files in the specified directory within the current working directory.
+    Each generation can get its own Workspace and tool set, so several projects
+    can be generated concurrently in one process without changing the working directory.
+    Every tool is instrumented; calls are only recorded while tool metrics are
+    enabled (see tool_metrics.enable_tool_metrics or AM_TOOLS_METRICS).
 
     Args:
-        directory: Directory path relative to current directory (default: '.')
-        pattern: Glob pattern for filtering files (default: '*' for all files)
+        workspace: The project directory the tools are sandboxed to
 
     Returns:
-        A formatted string listing all matching files
+        [read_file, read_many_files, search_code, write_file, replace_in_file, list_files, mkdir]
     """
-    # Resolve the path and ensure it's within current directory
-    current_dir = Path.cwd()
-    target_dir = (current_dir / directory).resolve()
-
-    # Security check: ensure the resolved path is within current directory
-    if not str(target_dir).startswith(str(current_dir)):
-        raise ValueError(f"Access denied: Path '{directory}' is outside current directory")
-
-    # Existing check: Check if the directory exists
-    if not target_dir.exists():
-        raise FileNotFoundError(f"Directory not found: {directory}")
-
-    # Type check: check if the path is a directory
-    if not target_dir.is_dir():
-        raise ValueError(f"Path is not a directory: {directory}")
-
-    # Find all matching files
-    files = list(target_dir.glob(pattern))
-
-    # If no files match the pattern, return a message
-    if not files:
-        return f"No files matching pattern '{pattern}' in {directory}"
-
-    # Format the file list
-    file_list = []
-    for file in sorted(files):
-        if file.is_file():
-            relative_path = file.relative_to(current_dir)
-            # stat stands for status, and st stands for struct
-            size = file.stat().st_size
-            # "  - data\file.txt (123 bytes)"
-            # \n usage
-            file_list.append(f"  - {relative_path} ({size} bytes)")
-
-    return f"Files in {directory}:\n" + "\n".join(file_list)
-
-
-@tool
-# 创建目录，可选递归创建父目录
-def mkdir(directory: str, parents: Optional[bool] = True, exist_ok: Optional[bool] = True) -> str:
-    """
-    Creates a directory within the current working directory.
-
-    Args:
-        directory: Directory path relative to current directory (e.g., 'data' or 'output/results')
-        parents: If True, create parent directories as needed (default: True)
-        exist_ok: If True, don't raise error if directory already exists (default: True)
 
-    Returns:
-        Success message with the created directory path
-    """
-    # Resolve the path and ensure it's within current directory
-    current_dir = Path.cwd()
-    target_dir = (current_dir / directory).resolve()
-
-    # Security check: ensure the resolved path is within current directory
-    if not str(target_dir).startswith(str(current_dir)):
-        raise ValueError(f"Access denied: Path '{directory}' is outside current directory")
-
-    # Check if directory already exists
-    if target_dir.exists():
-        if not exist_ok:
-            raise FileExistsError(f"Directory already exists: {directory}")
-        if not target_dir.is_dir():
-            raise ValueError(f"Path exists but is not a directory: {directory}")
-        return f"Directory already exists: {directory}"
-
-    # Create the directory
-    try:
-        target_dir.mkdir(parents=parents, exist_ok=exist_ok)
-        return f"Successfully created directory: {directory}"
-    except FileNotFoundError:
-        if not parents:
-            raise FileNotFoundError(f"Parent directory doesn't exist. Set parents=True to create parent directories: {directory}")
-        raise
+    @tool
+    # Reads and returns the content of a file in the current directory or subdirectories.
+    def read_file(
+        filepath: str,
+        start_line: Optional[int] = None,
+        max_lines: Optional[int] = None,
+        byte_offset: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> str:
+        """
+        Reads the content of a file in the current directory or subdirectories.
+        Large files can be read piece by piece, either by line range or by byte window.
+        When the returned text does not reach the end of the file, a continuation marker
+        is appended telling you which arguments to pass to read the next part.
+
+        Args:
+            filepath: Path to the file relative to current directory (e.g., 'data.txt' or 'folder/data.txt')
+            start_line: 1-based line number to start reading from (default: 1)
+            max_lines: Maximum number of lines to return (default: 2000)
+            byte_offset: Byte offset to start reading from; switches to byte-window mode (ignored with start_line)
+            max_bytes: Maximum number of bytes to return in byte-window mode (default: rest of the file)
+
+        Returns:
+            The content of the file (or of the requested window) as a string
+        """
+        return workspace.read_file(filepath, start_line, max_lines, byte_offset, max_bytes)
+
+    @tool
+    # 将内容写入文件，可以选择覆盖写入或追加
+    # Writes or appends content to a file in the current directory or subdirectories.
+    def write_file(filepath: str, content: str, mode: Optional[str] = 'w') -> str:
+        """
+        Writes content to a file in the current directory or subdirectories.
+        Creates parent directories if they don't exist.
+        Writing content identical to the current file is skipped. The result summarizes
+        what changed (lines added/removed and changed line ranges), so there is no need
+        to read the file back to confirm the edit.
+
+        Args:
+            filepath: Path to the file relative to current directory (e.g., 'output.txt' or 'results/output.txt')
+            content: The content to write to the file
+            mode: Write mode - 'w' for overwrite (default) or 'a' for append
+
+        Returns:
+            Success message with the file path and a summary of the change
+        """
+        return workspace.write_file(filepath, content, mode)
+
+    @tool
+    # 在文件中做精确的字符串替换，只需发送改动部分，而不是整个文件
+    # Replaces an exact snippet of a file, with a whitespace-tolerant fallback.
+    def replace_in_file(filepath: str, old_string: str, new_string: str, expected_replacements: Optional[int] = 1) -> str:
+        """
+        Replaces text inside an existing file without rewriting the whole file.
+        Prefer this over write_file for small fixes: only the changed snippet is sent.
+        old_string should include 2-3 lines of surrounding context so it matches exactly
+        the intended place. If no exact match exists, a match that differs only in
+        whitespace (indentation, line breaks) is used instead.
+
+        Args:
+            filepath: Path to the file relative to current directory (e.g., 'ui/js/main.js')
+            old_string: The exact text to replace, including surrounding context
+            new_string: The text to put in place of old_string
+            expected_replacements: Number of occurrences expected to be replaced, at least 1 (default: 1)
+
+        Returns:
+            Success message with the number of replacements and the lines they start at
+        """
+        return workspace.replace_in_file(filepath, old_string, new_string, expected_replacements)
+
+    @tool
+    # 列出某个目录下的文件，可以使用通配符模式筛选
+    def list_files(
+        directory: Optional[str] = '.',
+        pattern: Optional[str] = '*',
+        recursive: Optional[bool] = False,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        summary: Optional[bool] = False,
+        include_ignored: Optional[bool] = False,
+    ) -> str:
+        """
+        Lists files in the specified directory within the current working directory.
+        With recursive=True the whole tree is listed page by page (node_modules, .git, dist
+        and similar folders are skipped unless include_ignored=True); pass the returned
+        cursor to get the next page. With summary=True only per-directory file counts
+        and sizes are returned, which is the cheapest way to get an overview of a project.
+
+        Args:
+            directory: Directory path relative to current directory (default: '.')
+            pattern: Glob pattern for filtering files (default: '*' for all files); in recursive mode it matches the file name or the path relative to directory
+            recursive: If True, list files in all subdirectories (default: False)
+            page_size: Maximum number of files per page in recursive mode (default: 200)
+            cursor: Cursor returned by a previous recursive call, to fetch the next page
+            summary: If True, return a directory tree summary instead of individual files (implies recursive)
+            include_ignored: If True, also descend into node_modules, .git, dist, etc. in recursive mode (default: False)
+
+        Returns:
+            A formatted string listing all matching files
+        """
+        return workspace.list_files(directory, pattern, recursive, page_size, cursor, summary, include_ignored)
+
+    @tool
+    # 一次读取多个文件（支持通配符），并限制总的 token 数
+    # Reads several files (paths or glob patterns) in one call under a total token budget.
+    def read_many_files(paths: list[str], max_tokens: Optional[int] = 20000) -> str:
+        """
+        Reads several files in one call and returns them together, each preceded by a
+        '--- path ---' header. Use this instead of calling read_file repeatedly.
+        Entries are processed in the given order, so put the most important files first:
+        when the budget runs out, the current file is truncated and later files are skipped.
+
+        Args:
+            paths: File paths or glob patterns relative to current directory (e.g., ['PRD.md', 'ui/**/*.js'])
+            max_tokens: Approximate total token budget for all returned content (default: 20000)
+
+        Returns:
+            The concatenated file contents with per-file headers and a summary of anything truncated or skipped
+        """
+        return workspace.read_many_files(paths, max_tokens)
+
+    @tool
+    # 在项目中搜索代码（基于增量更新的 token 索引），只返回匹配的行和上下文
+    # Searches project files for a string or regex and returns matching lines with context.
+    def search_code(
+        query: str,
+        directory: Optional[str] = '.',
+        file_pattern: Optional[str] = None,
+        regex: Optional[bool] = False,
+        context_lines: Optional[int] = 2,
+        max_results: Optional[int] = 50,
+    ) -> str:
+        """
+        Searches the text files of a project for a string (or regular expression) and returns
+        only the matching lines with a few lines of context, as 'path:line: text'.
+        Use this to find where a function, variable or element id is used instead of
+        reading whole files. Dependency and build folders (node_modules, .git, dist) are skipped.
+
+        Args:
+            query: Text to search for, case-insensitive (e.g., 'saveState' or 'id="task-list"')
+            directory: Directory to search, relative to current directory (default: '.')
+            file_pattern: Optional glob to restrict the files searched (e.g., '*.js' or 'ui/js/*.js')
+            regex: If True, treat query as a Python regular expression (default: False)
+            context_lines: Number of lines shown before and after each match (default: 2)
+            max_results: Maximum number of matching lines to return (default: 50)
+
+        Returns:
+            Matching lines grouped per file, with line numbers and context
+        """
+        return workspace.search_code(query, directory, file_pattern, regex, context_lines, max_results)
+
+    @tool
+    # 创建目录，可选递归创建父目录
+    def mkdir(directory: str, parents: Optional[bool] = True, exist_ok: Optional[bool] = True) -> str:
+        """
+        Creates a directory within the current working directory.
+
+        Args:
+            directory: Directory path relative to current directory (e.g., 'data' or 'output/results')
+            parents: If True, create parent directories as needed (default: True)
+            exist_ok: If True, don't raise error if directory already exists (default: True)
+
+        Returns:
+            Success message with the created directory path
+        """
+        return workspace.mkdir(directory, parents, exist_ok)
+
+    tools = [read_file, read_many_files, search_code, write_file, replace_in_file, list_files, mkdir]
+    return [instrument_tool(t) for t in tools]
+
+
+# Tools bound to the process working directory, for scripts that chdir() into a project
+default_workspace = CurrentDirectoryWorkspace()
+read_file, read_many_files, search_code, write_file, replace_in_file, list_files, mkdir = make_file_tools(default_workspace)
+write_transaction = default_workspace.write_transaction
 
 
 # Example usage with smolagents
@@ -178,7 +204,7 @@ if __name__ == "__main__":
     # Create an agent with the file tools
     model = InferenceClientModel()
     agent = CodeAgent(
-        tools=[read_file, write_file, list_files, mkdir],
+        tools=[read_file, read_many_files, search_code, write_file, replace_in_file, list_files, mkdir],
         model=model
     )
 
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Catalog of the AppSpecs of all generated projects.
+
+Every <root>/<project>/app_spec.json is validated once through a shared pydantic
+TypeAdapter and kept in a compact columnar index, persisted in <root>/.app-catalog.json.
+refresh() only re-parses specs whose (mtime_ns, size) changed, and filtering by
+template or feature is a set lookup:
+
+    python app_catalog.py --template react-simple-spa
+    python app_catalog.py --feature "Dark mode" --stats
+"""
+import argparse
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from app_spec import AppSpec
+from atomic_io import atomic_write_text
+
+GENERATED_APPS_DIR = Path(__file__).resolve().parent / "generated_app"
+SPEC_FILE = "app_spec.json"
+CATALOG_FILE = ".app-catalog.json"
+# Bump when the persisted layout changes; older catalogs are rebuilt from scratch
+CATALOG_VERSION = 1
+
+# Building the validator is the expensive part of TypeAdapter; do it once per process
+_SPEC_ADAPTER = TypeAdapter(AppSpec)
+
+
+class CatalogEntry(NamedTuple):
+    project: str  # directory name under the catalog root
+    app_name: str
+    display_name: str
+    template_name: str
+    features: tuple
+    mtime_ns: int  # last modification of app_spec.json
+
+
+class AppCatalog:
+    """Columnar index over the app_spec.json files of one directory of projects."""
+
+    _COLUMNS = ("project", "app_name", "display_name", "template_name", "features", "mtime_ns", "size")
+
+    def __init__(self, root: Path = GENERATED_APPS_DIR):
+        """
+        Args:
+            root: Directory holding one sub-directory per generated project
+        """
+        self.root = Path(root).resolve()
+        self.catalog_path = self.root / CATALOG_FILE
+        # One list per column, row i describes one project
+        self._columns: dict[str, list] = {name: [] for name in self._COLUMNS}
+        self._by_template: dict[str, set] = {}
+        self._by_feature: dict[str, set] = {}
+        # project -> ((mtime_ns, size), error message) for specs that failed validation
+        self.errors: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._columns["project"])
+
+    def refresh(self) -> int:
+        """
+        Bring the catalog up to date with the spec files on disk.
+
+        Returns:
+            Number of spec files that were (re)parsed
+        """
+        with self._lock:
+            previous = self._rows_by_project() if self._loaded else self._read_catalog()
+            rows, errors, parsed = {}, {}, 0
+            if self.root.is_dir():
+                with os.scandir(self.root) as it:
+                    projects = [entry.name for entry in it if entry.is_dir() and not entry.name.startswith('.')]
+                for project in sorted(projects):
+                    spec_path = self.root / project / SPEC_FILE
+                    try:
+                        st = os.stat(spec_path)
+                    except FileNotFoundError:
+                        continue
+                    old = previous.get(project)
+                    if old is not None and (old["mtime_ns"], old["size"]) == (st.st_mtime_ns, st.st_size):
+                        rows[project] = old
+                        continue
+                    old_error = self.errors.get(project)
+                    if old is None and old_error is not None and old_error[0] == (st.st_mtime_ns, st.st_size):
+                        errors[project] = old_error
+                        continue
+                    parsed += 1
+                    try:
+                        with open(spec_path, 'rb') as f:
+                            spec = _SPEC_ADAPTER.validate_json(f.read())
+                    except ValidationError as e:
+                        first = e.errors()[0]
+                        location = ".".join(str(part) for part in first["loc"]) or "spec"
+                        errors[project] = ((st.st_mtime_ns, st.st_size), f"{location}: {first['msg']}")
+                        continue
+                    except OSError as e:
+                        errors[project] = ((st.st_mtime_ns, st.st_size), str(e))
+                        continue
+                    rows[project] = {
+                        "project": project,
+                        "app_name": spec.app_name,
+                        "display_name": spec.display_name,
+                        "template_name": spec.template_name,
+                        "features": tuple(spec.features),
+                        "mtime_ns": st.st_mtime_ns,
+                        "size": st.st_size,
+                    }
+
+            changed = parsed or set(rows) != set(previous)
+            self._build(rows)
+            self.errors = errors
+            self._loaded = True
+            if changed:
+                self._write_catalog()
+            return parsed
+
+    def entries(self) -> list[CatalogEntry]:
+        """All valid projects in directory name order."""
+        self._ensure_loaded()
+        return [self._entry(i) for i in range(len(self._columns["project"]))]
+
+    def filter(
+        self,
+        template: Optional[str] = None,
+        feature: Optional[str] = None,
+        text: Optional[str] = None,
+    ) -> list[CatalogEntry]:
+        """
+        Return the projects matching every given criterion.
+
+        Args:
+            template: Exact template name
+            feature: Feature name (case-insensitive exact match)
+            text: Case-insensitive substring of the app name or display name
+
+        Returns:
+            Matching entries in directory name order
+        """
+        self._ensure_loaded()
+        rows = None
+        if template is not None:
+            rows = set(self._by_template.get(template, ()))
+        if feature is not None:
+            matches = self._by_feature.get(feature.strip().lower(), set())
+            rows = set(matches) if rows is None else rows & matches
+        if rows is None:
+            rows = range(len(self._columns["project"]))
+        if text is not None:
+            needle = text.lower()
+            names, titles = self._columns["app_name"], self._columns["display_name"]
+            rows = [i for i in rows if needle in names[i].lower() or needle in titles[i].lower()]
+        return [self._entry(i) for i in sorted(rows)]
+
+    def template_counts(self) -> Counter:
+        self._ensure_loaded()
+        return Counter({name: len(rows) for name, rows in self._by_template.items()})
+
+    def feature_counts(self) -> Counter:
+        self._ensure_loaded()
+        return Counter({name: len(rows) for name, rows in self._by_feature.items()})
+
+    # Internal helpers
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.refresh()
+
+    def _entry(self, i: int) -> CatalogEntry:
+        c = self._columns
+        return CatalogEntry(c["project"][i], c["app_name"][i], c["display_name"][i],
+                            c["template_name"][i], c["features"][i], c["mtime_ns"][i])
+
+    def _rows_by_project(self) -> dict:
+        c = self._columns
+        return {c["project"][i]: {name: c[name][i] for name in self._COLUMNS} for i in range(len(c["project"]))}
+
+    def _build(self, rows: dict):
+        columns = {name: [] for name in self._COLUMNS}
+        by_template, by_feature = {}, {}
+        for i, project in enumerate(sorted(rows)):
+            row = rows[project]
+            for name in self._COLUMNS:
+                columns[name].append(row[name])
+            by_template.setdefault(row["template_name"], set()).add(i)
+            for feature in row["features"]:
+                by_feature.setdefault(feature.strip().lower(), set()).add(i)
+        self._columns, self._by_template, self._by_feature = columns, by_template, by_feature
+
+    def _read_catalog(self) -> dict:
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if data.get("version") != CATALOG_VERSION:
+            return {}
+        columns = data["columns"]
+        return {
+            project: {name: (tuple(columns[name][i]) if name == "features" else columns[name][i])
+                      for name in self._COLUMNS}
+            for i, project in enumerate(columns["project"])
+        }
+
+    def _write_catalog(self):
+        data = {"version": CATALOG_VERSION, "columns": self._columns}
+        try:
+            atomic_write_text(self.catalog_path, json.dumps(data, ensure_ascii=False))
+        except OSError:
+            # Read-only directory: the catalog still works, it just re-parses every process
+            pass
+
+
+_catalogs: dict[Path, AppCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_app_catalog(root: Path = GENERATED_APPS_DIR) -> AppCatalog:
+    """Return the process-wide catalog for root, creating it on first use."""
+    root = Path(root).resolve()
+    with _catalogs_lock:
+        catalog = _catalogs.get(root)
+        if catalog is None:
+            catalog = _catalogs[root] = AppCatalog(root)
+        return catalog
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List and filter generated projects by their AppSpec")
+    parser.add_argument("--root", default=str(GENERATED_APPS_DIR), help="Directory of generated projects")
+    parser.add_argument("--template", help="Only projects using this template")
+    parser.add_argument("--feature", help="Only projects with this feature (case-insensitive)")
+    parser.add_argument("--text", help="Only projects whose name contains this text")
+    parser.add_argument("--stats", action="store_true", help="Also show template and feature counts")
+    cli_args = parser.parse_args()
+
+    catalog = get_app_catalog(Path(cli_args.root))
+    parsed_count = catalog.refresh()
+    for item in catalog.filter(cli_args.template, cli_args.feature, cli_args.text):
+        print(f"{item.project:<28}{item.template_name:<28}{len(item.features):>3} features  {item.display_name}")
+    for project, (_, error) in sorted(catalog.errors.items()):
+        print(f"❌ {project}: {error}")
+    if cli_args.stats:
+        print(f"\n{len(catalog)} projects ({parsed_count} specs parsed)")
+        print("Templates: " + ", ".join(f"{name} ({n})" for name, n in catalog.template_counts().most_common()))
+        print("Top features: " + ", ".join(f"{name} ({n})" for name, n in catalog.feature_counts().most_common(10)))
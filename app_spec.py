@@ -1,5 +1,10 @@
+import hashlib
+import json
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
+
+# Bump when the normalization below changes, so old fingerprints stop matching
+FINGERPRINT_VERSION = 1
 
 
 class AppSpec(BaseModel):
@@ -39,6 +44,50 @@ class AppSpec(BaseModel):
             }
         }
 
+    def canonical_fields(self) -> dict:
+        """
+        Normalized identity fields: whitespace collapsed, features case-folded, de-duplicated and sorted.
+        
+        output_dir is left out on purpose; where an app is written doesn't change what it is.
+        """
+        def norm(value: Optional[str]) -> Optional[str]:
+            return " ".join(value.split()) if value is not None else None
+
+        features = sorted({norm(f).casefold() for f in self.features if norm(f)})
+        return {
+            "app_name": norm(self.app_name),
+            "display_name": norm(self.display_name),
+            "description": norm(self.description),
+            "author": norm(self.author),
+            "version": norm(self.version),
+            "template_name": norm(self.template_name),
+            "custom_content": self.custom_content.strip() if self.custom_content else None,
+            "features": features,
+        }
+
+    def fingerprint(self, template_hash: str = "", prompt_versions: Optional[Dict[str, str]] = None) -> str:
+        """
+        Stable content hash of this spec as rendered with a template and a set of prompts.
+        
+        Two specs that differ only in whitespace, feature order/case or output_dir get
+        the same fingerprint; any change to the template or a prompt gives a new one.
+        
+        Args:
+            template_hash: Content hash of the template (e.g. TemplateInfo.content_hash)
+            prompt_versions: Prompt name -> content hash of every prompt the pipeline uses
+        
+        Returns:
+            sha256 hex digest
+        """
+        payload = {
+            "v": FINGERPRINT_VERSION,
+            "spec": self.canonical_fields(),
+            "template": template_hash,
+            "prompts": dict(sorted((prompt_versions or {}).items())),
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,31 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+
+def atomic_write_text(path: Path, text: str, mode_from: Optional[Path] = None):
+    """
+    Write text to path atomically: readers see either the old file or the new one, never half of it.
+
+    The text goes to a uniquely named temp file next to path, which is then renamed over
+    it. The rename replaces the directory entry, so other hard links to the old file keep
+    their content. The temp file is removed if anything fails.
+
+    Args:
+        path: File to write
+        text: Its new content (UTF-8)
+        mode_from: File whose permission bits the new file gets (default: mkstemp's 0600)
+    """
+    path = Path(path)
+    fd, temp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if mode_from is not None:
+            shutil.copymode(mode_from, temp_name)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
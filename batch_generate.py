@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Generate many apps from AppSpecs in parallel.
+
+Specs are read from a JSON file (one object or a list of objects) or a JSONL file
+(one object per line) and generated on a process pool:
+
+    python batch_generate.py specs.jsonl --workers 8
+    python batch_generate.py specs.json --install --report report.json
+
+Every app is written to its own <output_dir>/<app_name> directory; a batch whose
+output directories overlap is rejected before anything is generated.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from pydantic import ValidationError
+
+from app_spec import AppSpec
+from dependency_store import get_dependency_store
+from template_generator import generate_app_from_spec
+from template_registry import get_template_registry
+
+
+@dataclass
+class BatchResult:
+    """Outcome of generating one app of a batch."""
+    app_name: str
+    output_path: str
+    ok: bool
+    seconds: float
+    message: str
+
+
+def load_specs(path: str) -> list[AppSpec]:
+    """
+    Load AppSpecs from a .json file (object or list) or a .jsonl file (one object per line).
+
+    Args:
+        path: Spec file
+
+    Returns:
+        The validated specs in file order
+
+    Raises:
+        ValueError: If the file is not valid JSON or a spec does not validate
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    if path.endswith('.jsonl'):
+        items = []
+        for line_number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append((f"line {line_number}", json.loads(line)))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}: line {line_number} is not valid JSON: {e}")
+    else:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path} is not valid JSON: {e}")
+        data = data if isinstance(data, list) else [data]
+        items = [(f"spec {index + 1}", item) for index, item in enumerate(data)]
+
+    specs = []
+    for where, item in items:
+        try:
+            specs.append(AppSpec.model_validate(item))
+        except ValidationError as e:
+            raise ValueError(f"{path}: {where} is not a valid AppSpec: {e}")
+    return specs
+
+
+def check_output_dirs(specs: list[AppSpec]):
+    """
+    Make sure no two specs write into the same directory, or one into another's.
+
+    Raises:
+        ValueError: Listing the conflicting apps
+    """
+    paths = sorted(
+        ((Path(spec.output_dir) / spec.app_name).resolve(), spec.app_name) for spec in specs
+    )
+    conflicts = []
+    # Sorted, so a path and anything inside it are always neighbours
+    for (path, name), (next_path, next_name) in zip(paths, paths[1:]):
+        if next_path == path or next_path.is_relative_to(path):
+            conflicts.append(f"'{name}' ({path}) and '{next_name}' ({next_path})")
+    if conflicts:
+        raise ValueError("Output directories overlap: " + "; ".join(conflicts))
+
+
+def validate_specs(specs: list[AppSpec]) -> list[Path]:
+    """
+    Check every spec against the template registry before anything is generated.
+
+    Returns:
+        The template directory of each spec
+
+    Raises:
+        ValueError: Listing every invalid spec
+    """
+    registry = get_template_registry()
+    templates, problems = [], []
+    for spec in specs:
+        try:
+            templates.append(registry.validate_spec(spec).path)
+        except ValueError as e:
+            problems.append(f"{spec.app_name}: {e}")
+    if problems:
+        raise ValueError("Invalid specs:\n  " + "\n  ".join(problems))
+    return templates
+
+
+def generate_batch(
+    specs: list[AppSpec],
+    max_workers: Optional[int] = None,
+    copy_mode: str = "auto",
+    install_deps: bool = False,
+    incremental: bool = False,
+    on_result: Optional[Callable[[BatchResult], None]] = None,
+) -> list[BatchResult]:
+    """
+    Generate every spec on a process pool.
+
+    A failing app doesn't stop the others; its error is reported in its result.
+
+    Args:
+        specs: Apps to generate
+        max_workers: Maximum number of concurrent generations (default: CPU count, at most len(specs))
+        copy_mode: Passed to generate_app_from_spec
+        install_deps: Install dependencies offline from the shared pnpm store
+        incremental: Update existing apps in place, keeping edited files
+        on_result: Called in the parent process as each app finishes
+
+    Returns:
+        One BatchResult per spec, in the order of specs
+
+    Raises:
+        ValueError: If output directories overlap or a spec fails validation (nothing is generated)
+    """
+    if not specs:
+        return []
+    check_output_dirs(specs)
+    templates = validate_specs(specs)
+
+    if install_deps:
+        # Fill the store once up front instead of letting every worker race to do it
+        store = get_dependency_store()
+        for template_path in sorted(set(templates)):
+            store.prewarm(template_path)
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(specs)))
+    results: list[Optional[BatchResult]] = [None] * len(specs)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_generate_one, spec.model_dump(), copy_mode, install_deps, incremental): index
+            for index, spec in enumerate(specs)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. killed); _generate_one catches everything else
+                spec = specs[index]
+                result = BatchResult(spec.app_name, str(Path(spec.output_dir) / spec.app_name),
+                                     False, 0.0, f"{type(e).__name__}: {e}")
+            results[index] = result
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+def _generate_one(spec_data: dict, copy_mode: str, install_deps: bool, incremental: bool) -> BatchResult:
+    """Worker entry point: generate one app and never raise."""
+    spec = AppSpec.model_validate(spec_data)
+    output_path = str(Path(spec.output_dir) / spec.app_name)
+    started = time.perf_counter()
+    try:
+        message = generate_app_from_spec(spec, copy_mode=copy_mode, install_deps=install_deps, incremental=incremental)
+        ok = not message.startswith("❌")
+        if not ok:
+            message = message.lstrip("❌ ")
+    except Exception as e:
+        message, ok = f"{type(e).__name__}: {e}", False
+    return BatchResult(spec.app_name, output_path, ok, round(time.perf_counter() - started, 3), message)
+
+
+def format_summary(results: list[BatchResult], wall_seconds: float) -> str:
+    """Per-app timing table plus totals."""
+    lines = [f"{'app':<32}{'status':<8}{'seconds':>9}  output"]
+    for r in results:
+        lines.append(f"{r.app_name:<32}{'ok' if r.ok else 'FAILED':<8}{r.seconds:>9.2f}  {r.output_path}")
+    failed = [r for r in results if not r.ok]
+    lines.append(
+        f"\n{len(results) - len(failed)}/{len(results)} apps generated in {wall_seconds:.2f}s "
+        f"(sum of per-app time {sum(r.seconds for r in results):.2f}s)"
+    )
+    for r in failed:
+        lines.append(f"❌ {r.app_name}: {r.message}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate many apps from AppSpecs in parallel")
+    parser.add_argument("specs", help="JSON (object or list) or JSONL file of AppSpecs")
+    parser.add_argument("--workers", type=int, default=None, help="Maximum parallel generations (default: CPU count)")
+    parser.add_argument("--copy-mode", default="auto", choices=["auto", "reflink", "hardlink", "copy"],
+                        help="How unchanged template files are materialized (default: auto = reflink, else copy; "
+                             "hardlink shares inodes with the template and is unsafe to edit in place)")
+    parser.add_argument("--install", action="store_true", help="Install dependencies offline from the shared pnpm store")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Update existing apps in place instead of recreating them (edited files are kept)")
+    parser.add_argument("--report", help="Also write the per-app results to this JSON file")
+    cli_args = parser.parse_args()
+
+    try:
+        batch_specs = load_specs(cli_args.specs)
+        started = time.perf_counter()
+        batch_results = generate_batch(
+            batch_specs,
+            max_workers=cli_args.workers,
+            copy_mode=cli_args.copy_mode,
+            install_deps=cli_args.install,
+            incremental=cli_args.incremental,
+            on_result=lambda r: print(f"{'✅' if r.ok else '❌'} {r.app_name} ({r.seconds:.2f}s)", flush=True),
+        )
+    except (ValueError, FileNotFoundError, RuntimeError) as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    print()
+    print(format_summary(batch_results, time.perf_counter() - started))
+    if cli_args.report:
+        with open(cli_args.report, 'w', encoding='utf-8') as f:
+            json.dump([asdict(r) for r in batch_results], f, indent=2, ensure_ascii=False)
+    sys.exit(0 if all(r.ok for r in batch_results) else 1)
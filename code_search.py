@@ -0,0 +1,179 @@
+import os
+import re
+import threading
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterator, Optional
+
+from file_cache import file_cache
+
+# Directories that never contain project source worth showing to an agent
+IGNORED_DIR_NAMES = frozenset({
+    'node_modules', '.git', 'dist', 'build', '.vite', '.next', '.cache',
+    '__pycache__', '.venv', 'venv', '.pytest_cache', '.mypy_cache',
+})
+
+# Only files up to this size are indexed; bigger ones are almost never hand-written code
+MAX_INDEXED_FILE_BYTES = 1024 * 1024
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def is_ignored_dir(name: str) -> bool:
+    """True for directories skipped by default (dependencies, VCS, build output, staging dirs)."""
+    return name in IGNORED_DIR_NAMES or name.startswith('.am_txn_')
+
+
+def scan_files(root: Path, ignore_dirs: bool = True) -> Iterator[tuple[str, os.DirEntry]]:
+    """
+    Walk root depth-first with os.scandir, yielding files in sorted order.
+
+    Each DirEntry caches its stat result, so callers get size/mtime with at most
+    one stat call per entry.
+
+    Args:
+        root: Directory to walk
+        ignore_dirs: Skip IGNORED_DIR_NAMES (default: True)
+
+    Yields:
+        (path relative to root in POSIX form, DirEntry) for every regular file
+    """
+    stack = [(root, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except (PermissionError, FileNotFoundError):
+            continue
+        subdirs = []
+        for entry in entries:
+            relative = f"{prefix}{entry.name}"
+            if entry.is_dir(follow_symlinks=False):
+                if not (ignore_dirs and is_ignored_dir(entry.name)):
+                    subdirs.append((Path(entry.path), f"{relative}/"))
+            elif entry.is_file():
+                yield relative, entry
+        # Reverse so the stack pops subdirectories in sorted order
+        stack.extend(reversed(subdirs))
+
+
+class CodeSearchIndex:
+    """Token index over the text files of one project directory.
+
+    Every file's lower-cased identifier tokens are kept in an inverted index.
+    refresh() re-tokenizes only files whose (mtime_ns, size) changed, so searching
+    a project repeatedly costs one directory walk plus the files that really changed.
+    """
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Resolved project directory to index
+        """
+        self.root = Path(root)
+        # relative path -> ((mtime_ns, size), tokens)
+        self._files: dict[str, tuple[tuple[int, int], frozenset]] = {}
+        # token -> relative paths containing it
+        self._postings: dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """Bring the index up to date with the files on disk; returns how many files were re-indexed."""
+        with self._lock:
+            seen = set()
+            reindexed = 0
+            for relative, entry in scan_files(self.root):
+                st = entry.stat()
+                if st.st_size > MAX_INDEXED_FILE_BYTES:
+                    continue
+                seen.add(relative)
+                validator = (st.st_mtime_ns, st.st_size)
+                current = self._files.get(relative)
+                if current is not None and current[0] == validator:
+                    continue
+                try:
+                    text = file_cache.get_text(Path(entry.path))
+                except (UnicodeDecodeError, OSError):
+                    # Binary or unreadable file: remember it so it isn't retried every refresh
+                    text = ''
+                self._replace(relative, validator, frozenset(_TOKEN_RE.findall((text or '').lower())))
+                reindexed += 1
+            for relative in set(self._files) - seen:
+                self._replace(relative, None, None)
+            return reindexed
+
+    def candidates(self, query: str) -> list[str]:
+        """
+        Return the indexed files that can contain query as a (case-insensitive) substring.
+
+        Every word in query must appear inside some token of the file, so a file
+        lacking any of them is never opened.
+        """
+        words = _TOKEN_RE.findall(query.lower())
+        with self._lock:
+            if not words:
+                return sorted(self._files)
+            result = None
+            for word in words:
+                files = self._postings.get(word, set()).copy()
+                # Partial identifiers ('saveSta') match longer tokens ('savestate')
+                for token, paths in self._postings.items():
+                    if word in token and token != word:
+                        files |= paths
+                result = files if result is None else result & files
+                if not result:
+                    return []
+            return sorted(result)
+
+    def indexed_files(self) -> list[str]:
+        """All indexed relative paths in sorted order."""
+        with self._lock:
+            return sorted(self._files)
+
+    # Must be called with self._lock held
+    def _replace(self, relative: str, validator, tokens: Optional[frozenset]):
+        previous = self._files.pop(relative, None)
+        if previous is not None:
+            for token in previous[1]:
+                paths = self._postings.get(token)
+                if paths is not None:
+                    paths.discard(relative)
+                    if not paths:
+                        del self._postings[token]
+        if tokens is not None:
+            self._files[relative] = (validator, tokens)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(relative)
+
+
+_indexes: dict[Path, CodeSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(root: Path) -> CodeSearchIndex:
+    """Return the process-wide index for root, creating it on first use."""
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = CodeSearchIndex(root)
+        return index
+
+
+def search_lines(
+    text: str,
+    query: str,
+    regex: bool = False,
+    case_sensitive: bool = False,
+) -> list[int]:
+    """Return the 0-based numbers of the lines of text that match query."""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    pattern = re.compile(query if regex else re.escape(query), flags)
+    return [i for i, line in enumerate(text.splitlines()) if pattern.search(line)]
+
+
+def matches_file_pattern(relative: str, file_pattern: Optional[str]) -> bool:
+    """Filter on a glob against either the file name or the relative path."""
+    if not file_pattern:
+        return True
+    return fnmatch(relative, file_pattern) or fnmatch(relative.rsplit('/', 1)[-1], file_pattern)
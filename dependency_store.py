@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Shared offline pnpm store for generated apps.
+
+The store is filled once per template lockfile with `pnpm fetch`, which needs
+only pnpm-lock.yaml. After that every generated app installs with
+`pnpm install --offline --frozen-lockfile` and gets its packages linked from the
+content-addressed store, without network access. The sha256 of every prewarmed
+lockfile is recorded, so an app whose lockfile no longer matches the store is
+detected before pnpm runs:
+
+    python dependency_store.py prewarm react-simple-spa
+    python dependency_store.py status
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from atomic_io import atomic_write_text
+
+LOCKFILE_NAME = "pnpm-lock.yaml"
+# Can be overridden with the VIBECODER_PNPM_STORE environment variable
+DEFAULT_STORE_DIR = Path.home() / ".cache" / "vibecoder" / "pnpm-store"
+# Lockfile hashes the store was prewarmed for, kept next to the store content
+STORE_MANIFEST_NAME = "vibecoder-prewarmed.json"
+
+
+def lockfile_hash(path: Path) -> str:
+    """sha256 hex digest of a lockfile."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DependencyStore:
+    """A pnpm content-addressed store plus the list of lockfiles it fully covers."""
+
+    def __init__(self, store_dir: Optional[Path] = None):
+        """
+        Args:
+            store_dir: pnpm store directory (default: VIBECODER_PNPM_STORE or DEFAULT_STORE_DIR)
+        """
+        self.store_dir = Path(store_dir or os.environ.get('VIBECODER_PNPM_STORE') or DEFAULT_STORE_DIR)
+        self.manifest_path = self.store_dir / STORE_MANIFEST_NAME
+        self._lock = threading.Lock()
+
+    def prewarmed(self) -> dict:
+        """Return lockfile sha256 -> details for every lockfile fetched into the store."""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def is_warm(self, lockfile: Path) -> bool:
+        """True if every package of lockfile is already in the store."""
+        return lockfile_hash(lockfile) in self.prewarmed()
+
+    def prewarm(self, template_dir: Path, force: bool = False) -> str:
+        """
+        Download every package of a template's lockfile into the store (needs network once).
+
+        pnpm runs in a scratch directory holding only the lockfile and package.json,
+        so the template itself never gets a node_modules directory.
+
+        Args:
+            template_dir: Template directory containing pnpm-lock.yaml
+            force: Fetch again even if the lockfile hash is already recorded
+
+        Returns:
+            Status message
+        """
+        template_dir = Path(template_dir)
+        lockfile = template_dir / LOCKFILE_NAME
+        if not lockfile.is_file():
+            raise FileNotFoundError(f"No {LOCKFILE_NAME} in {template_dir}")
+
+        digest = lockfile_hash(lockfile)
+        with self._lock:
+            if not force and digest in self.prewarmed():
+                return f"Store already warm for {template_dir.name} ({digest[:12]})"
+
+            started = time.perf_counter()
+            with tempfile.TemporaryDirectory(prefix='vibecoder-fetch-') as scratch:
+                shutil.copy2(lockfile, scratch)
+                if (template_dir / "package.json").is_file():
+                    shutil.copy2(template_dir / "package.json", scratch)
+                _run_pnpm(["fetch", "--store-dir", str(self.store_dir)], Path(scratch))
+            elapsed = time.perf_counter() - started
+
+            entries = self.prewarmed()
+            entries[digest] = {
+                "template": template_dir.name,
+                "fetched_at": datetime.now().isoformat(timespec='seconds'),
+                "fetch_seconds": round(elapsed, 1),
+            }
+            self._write_manifest(entries)
+        return f"Prewarmed store for {template_dir.name} in {elapsed:.1f}s ({digest[:12]})"
+
+    def install(self, app_dir: Path) -> str:
+        """
+        Install an app's dependencies from the store without network access.
+
+        Args:
+            app_dir: Generated app directory containing pnpm-lock.yaml
+
+        Returns:
+            Status message
+
+        Raises:
+            RuntimeError: If the store was not prewarmed for this lockfile, or pnpm fails
+        """
+        app_dir = Path(app_dir)
+        lockfile = app_dir / LOCKFILE_NAME
+        if not lockfile.is_file():
+            raise FileNotFoundError(f"No {LOCKFILE_NAME} in {app_dir}")
+
+        digest = lockfile_hash(lockfile)
+        if digest not in self.prewarmed():
+            raise RuntimeError(
+                f"Dependency store {self.store_dir} was not prewarmed for {lockfile} ({digest[:12]}); "
+                f"run 'python dependency_store.py prewarm <template>' first"
+            )
+
+        started = time.perf_counter()
+        _run_pnpm(["install", "--offline", "--frozen-lockfile", "--store-dir", str(self.store_dir)], app_dir)
+        return f"Installed dependencies offline in {time.perf_counter() - started:.1f}s"
+
+    def ensure_installed(self, app_dir: Path, template_dir: Path) -> str:
+        """Prewarm the store for the template if needed, then install the app offline."""
+        messages = []
+        if not self.is_warm(Path(template_dir) / LOCKFILE_NAME):
+            messages.append(self.prewarm(template_dir))
+        messages.append(self.install(app_dir))
+        return "; ".join(messages)
+
+    def _write_manifest(self, entries: dict):
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        # Atomic, so concurrent readers never see a half-written manifest
+        atomic_write_text(self.manifest_path, json.dumps(entries, indent=2))
+
+
+def _run_pnpm(args: list, cwd: Path):
+    pnpm = shutil.which("pnpm")
+    if pnpm is None:
+        raise FileNotFoundError("pnpm not found on PATH (install it with 'npm install -g pnpm' or 'corepack enable')")
+    result = subprocess.run([pnpm, *args], cwd=cwd, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    if result.returncode != 0:
+        output = (result.stderr or result.stdout).strip()
+        raise RuntimeError(f"pnpm {args[0]} failed (exit {result.returncode}): {output[-2000:]}")
+
+
+_default_store: Optional[DependencyStore] = None
+
+
+def get_dependency_store() -> DependencyStore:
+    """Return the process-wide store at the default location."""
+    global _default_store
+    if _default_store is None:
+        _default_store = DependencyStore()
+    return _default_store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the shared offline pnpm store")
+    parser.add_argument("command", choices=["prewarm", "status"])
+    parser.add_argument("templates", nargs="*", default=["react-simple-spa"],
+                        help="Template names under templates/ (default: react-simple-spa)")
+    parser.add_argument("--force", action="store_true", help="Fetch even if the lockfile is already recorded")
+    cli_args = parser.parse_args()
+
+    store = get_dependency_store()
+    templates_root = Path(__file__).resolve().parent / "templates"
+    for name in cli_args.templates:
+        template_dir = templates_root / name
+        if cli_args.command == "prewarm":
+            print(store.prewarm(template_dir, force=cli_args.force))
+        else:
+            state = "warm" if store.is_warm(template_dir / LOCKFILE_NAME) else "cold"
+            print(f"{name}: {state} ({store.store_dir})")
@@ -0,0 +1,141 @@
+import errno
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+# 'auto' tries a reflink and falls back to a plain copy. 'hardlink' is opt-in only:
+# a hardlinked file shares its inode with the template, so any in-place write to it
+# (an editor save, prettier --write, eslint --fix, >>) changes the template and every
+# other app materialized from it.
+COPY_MODES = ("auto", "reflink", "hardlink", "copy")
+_METHODS = {"auto": ("reflink",), "reflink": ("reflink",), "hardlink": ("hardlink",), "copy": ()}
+
+# Linux ioctl that shares the data blocks of two files (btrfs, xfs, bcachefs, ...)
+_FICLONE = 0x40049409
+
+# Errors meaning "this filesystem (pair) can't do that", as opposed to real I/O failures
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOTTY, errno.EMLINK,
+    getattr(errno, 'EOPNOTSUPP', errno.EINVAL), getattr(errno, 'ENOTSUP', errno.EINVAL),
+}
+
+
+def materialize_tree(
+    source: Path,
+    destination: Path,
+    copy_files: Iterable[str] = (),
+    mode: str = "auto",
+    skip_files: Iterable[str] = (),
+) -> dict[str, int]:
+    """
+    Recreate the source tree at destination without copying file data where possible.
+
+    Files are reflinked (copy-on-write clones) where the filesystem supports it and
+    copied otherwise; the paths in copy_files always get a private copy because
+    they are edited in place afterwards. Symlinks are recreated as symlinks.
+
+    Warning: mode="hardlink" makes every file share its inode with the source. Only
+    Workspace knows to replace such a file instead of writing into it; any other
+    in-place write (editors, formatters, shell redirection) silently modifies the
+    source and every other tree linked to it. Use it only for throwaway output.
+
+    Args:
+        source: Template directory to materialize
+        destination: New directory to create (must not exist yet)
+        copy_files: POSIX paths relative to source that must be real copies
+        mode: One of COPY_MODES (default: "auto")
+        skip_files: POSIX paths relative to source that are not materialized at all
+            (e.g. files the caller renders itself)
+
+    Returns:
+        Number of files per method: {"reflinked", "hardlinked", "copied", "symlinks"}
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode '{mode}'. Choose one of: {', '.join(COPY_MODES)}")
+
+    source = Path(source)
+    destination = Path(destination)
+    private = set(copy_files)
+    skipped = set(skip_files)
+    stats = {"reflinked": 0, "hardlinked": 0, "copied": 0, "symlinks": 0}
+    # Methods still worth trying; one that fails for lack of support is not retried for every file
+    methods = list(_METHODS[mode])
+
+    destination.mkdir(parents=True)
+    stack = [(source, destination, '')]
+    while stack:
+        src_dir, dst_dir, prefix = stack.pop()
+        with os.scandir(src_dir) as it:
+            entries = list(it)
+        for entry in entries:
+            relative = f"{prefix}{entry.name}"
+            target = dst_dir / entry.name
+            if relative in skipped:
+                continue
+            if entry.is_symlink():
+                os.symlink(os.readlink(entry.path), target, target_is_directory=entry.is_dir())
+                stats["symlinks"] += 1
+            elif entry.is_dir():
+                target.mkdir()
+                shutil.copystat(entry.path, target)
+                stack.append((Path(entry.path), target, f"{relative}/"))
+            elif relative in private:
+                shutil.copy2(entry.path, target)
+                stats["copied"] += 1
+            else:
+                stats[_share_file(entry.path, target, methods)] += 1
+    return stats
+
+
+def _share_file(source: str, target: Path, methods: list) -> str:
+    """Reflink or hardlink source to target using the first method that works; copy otherwise."""
+    for method in list(methods):
+        try:
+            if method == "reflink":
+                _reflink(source, target)
+                return "reflinked"
+            os.link(source, target)
+            return "hardlinked"
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            methods.remove(method)
+            # A half-created clone must not block the next attempt
+            if target.exists():
+                target.unlink()
+    shutil.copy2(source, target)
+    return "copied"
+
+
+def _reflink(source: str, target: Path):
+    """Clone source into target with FICLONE (Linux only; raises EOPNOTSUPP elsewhere)."""
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflink is not supported on this platform")
+
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source, target)
+
+
+def materialize_file(source: Path, target: Path, mode: str = "auto") -> str:
+    """
+    Replace target with a reflink or copy of source, or a hardlink if asked for (see materialize_tree).
+
+    Args:
+        source: File to share
+        target: Destination; an existing file there is replaced
+        mode: One of COPY_MODES (default: "auto")
+
+    Returns:
+        "reflinked", "hardlinked" or "copied"
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode '{mode}'. Choose one of: {', '.join(COPY_MODES)}")
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists() or target.is_symlink():
+        target.unlink()
+    return _share_file(str(source), target, list(_METHODS[mode]))
@@ -0,0 +1,181 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+from tool_metrics import record_io
+
+
+class FileContentCache:
+    """Process-wide LRU cache for file contents and directory listings used by am_tools.
+
+    File entries are keyed on the resolved path and validated against (mtime_ns, size)
+    on every lookup, so a file changed by anything outside am_tools is re-read.
+    Listing entries hold only the names of a directory's files and are validated against
+    the directory mtime; callers stat the files themselves. Writes made through
+    am_tools call invalidate() so the next read always sees the new content.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entry_bytes: int = 2 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Total byte budget for all cached entries
+            max_entry_bytes: Files larger than this are never cached (callers stream them instead)
+        """
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        # key -> (validator, value, cost); most recently used entries are at the end
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the hit/miss counters (e.g. at the start of a generation)."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bytes served from memory vs. bytes actually read from disk
+        self.bytes_saved = 0
+        self.bytes_read = 0
+
+    def stats(self) -> dict:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "bytes_saved": self.bytes_saved,
+                "bytes_read": self.bytes_read,
+                "entries": len(self._entries),
+                "cached_bytes": self._total_bytes,
+            }
+
+    def format_stats(self) -> str:
+        """Human readable one-line summary of the counters."""
+        s = self.stats()
+        return (
+            f"File cache: {s['hits']} hits / {s['misses']} misses (hit rate {s['hit_rate']:.0%}), "
+            f"{s['bytes_saved']} bytes served from memory, {s['bytes_read']} bytes read from disk, "
+            f"{s['evictions']} evictions, {s['invalidations']} invalidations"
+        )
+
+    def get_text(self, path: Path) -> Optional[str]:
+        """
+        Return the UTF-8 text of a file, reading it from disk only when it changed.
+
+        Args:
+            path: Resolved path of an existing regular file
+
+        Returns:
+            The file content, or None if the file is too large to be cached
+        """
+        st = os.stat(path)
+        if st.st_size > self.max_entry_bytes:
+            return None
+
+        key = ("file", str(path))
+        validator = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._lookup(key, validator)
+            if cached is not None:
+                self.bytes_saved += st.st_size
+                return cached
+
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+        record_io(bytes_read=st.st_size)
+        with self._lock:
+            self.bytes_read += st.st_size
+            self._store(key, validator, text, st.st_size)
+        return text
+
+    def get_listing(self, directory: Path, pattern: str, build: Callable[[], list[str]]) -> list[str]:
+        """
+        Return the cached names of a directory's matching files, rebuilding them when the directory changed.
+
+        Only names are cached: a file changing in place doesn't bump the directory mtime,
+        so sizes and other metadata must be read by the caller on every call.
+
+        Args:
+            directory: Resolved directory the listing was produced for
+            pattern: Glob pattern used for the listing (part of the key)
+            build: Callable that produces the file names on a miss
+
+        Returns:
+            The file names
+        """
+        key = ("list", str(directory), pattern)
+        validator = os.stat(directory).st_mtime_ns
+        with self._lock:
+            cached = self._lookup(key, validator)
+            if cached is not None:
+                return cached
+
+        names = build()
+        with self._lock:
+            self._store(key, validator, names, sum(len(name) for name in names))
+        return names
+
+    def invalidate(self, path: Path):
+        """
+        Drop every entry affected by a change to path: the file itself and any
+        cached listing of one of its parent directories.
+
+        Args:
+            path: Resolved path that was written, appended to or created
+        """
+        path_str = str(path)
+        parents = {str(p) for p in path.parents}
+        with self._lock:
+            for key in list(self._entries):
+                if key[1] == path_str or (key[0] == "list" and key[1] in parents):
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    # Internal helpers, must be called with self._lock held
+    def _lookup(self, key: tuple, validator):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == validator:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        if entry is not None:
+            # Stale entry: the file or directory changed on disk
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def _store(self, key: tuple, validator, value, cost: int):
+        if cost > self.max_entry_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (validator, value, cost)
+        self._total_bytes += cost
+        # Evict least recently used entries until we are back under budget
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: tuple):
+        _, _, cost = self._entries.pop(key)
+        self._total_bytes -= cost
+
+
+# Shared by every agent and tool in the process
+file_cache = FileContentCache()
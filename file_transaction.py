@@ -0,0 +1,229 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from file_cache import file_cache
+
+STAGING_PREFIX = '.am_txn_'
+# A staging directory untouched for this long belongs to a run that was killed
+STALE_STAGING_SECONDS = 6 * 60 * 60
+
+_swept_roots: set[Path] = set()
+_swept_lock = threading.Lock()
+
+
+class WriteTransaction:
+    """Stages file writes in a temporary directory and applies them all at once.
+
+    Staged files live in a hidden directory inside root, so the final os.replace()
+    is an atomic rename on the same filesystem. Nothing under root changes until
+    commit() (or flush()); rollback() simply throws the staging directory away.
+    """
+
+    def __init__(self, root: Path):
+        """
+        Args:
+            root: Directory all staged targets must live under
+        """
+        self.root = Path(root).resolve()
+        self._staging_dir: Optional[Path] = None
+        # target path -> staged temp file, in first-write order
+        self._staged: dict[Path, Path] = {}
+        self._lock = threading.Lock()
+        self.closed = False
+        sweep_stale_staging_dirs(self.root)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def stage(self, target: Path, content: str, mode: str = 'w'):
+        """
+        Stage new content for target without touching target itself.
+
+        Args:
+            target: Resolved destination path (must be inside root)
+            content: Text to write
+            mode: 'w' to replace the content, 'a' to append to the current (staged or on-disk) content
+        """
+        if not target.is_relative_to(self.root):
+            raise ValueError(f"Path '{target}' is outside the transaction root {self.root}")
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("Transaction is already committed or rolled back")
+            if mode == 'a':
+                content = (self._read_current(target) or '') + content
+            staged_path = self._staged.get(target)
+            if staged_path is None:
+                if self._staging_dir is None:
+                    self._staging_dir = Path(tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self.root))
+                staged_path = self._staging_dir / f"{len(self._staged)}.tmp"
+                self._staged[target] = staged_path
+            with open(staged_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+
+    def staged_text(self, target: Path) -> Optional[str]:
+        """Return the staged content for target, or None if it has not been written in this transaction."""
+        with self._lock:
+            staged_path = self._staged.get(target)
+            if staged_path is None:
+                return None
+            with open(staged_path, 'r', encoding='utf-8') as f:
+                return f.read()
+
+    def staged_files(self) -> dict[Path, int]:
+        """Return every staged target with the size of its staged content in bytes."""
+        with self._lock:
+            return {target: staged.stat().st_size for target, staged in self._staged.items()}
+
+    def commit(self):
+        """Atomically move every staged file into place and close the transaction.
+
+        All staged files are flushed to disk in one pass before the first rename, and
+        each touched directory is synced once afterwards. If a rename fails, targets
+        already replaced are restored from their backups.
+        """
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._apply()
+
+    def flush(self):
+        """Commit the files staged so far, like commit(), but keep the transaction open.
+
+        Later writes are staged again and a rollback() only discards those, e.g. to let
+        a tool that reads the disk directly see everything written before it runs.
+        """
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("Transaction is already committed or rolled back")
+            self._apply()
+
+    def rollback(self):
+        """Discard all staged writes; files under root are left as they were (or as of the last flush())."""
+        with self._lock:
+            self.closed = True
+            self._cleanup()
+
+    # Internal helpers, must be called with self._lock held
+    def _apply(self):
+        if not self._staged:
+            self._cleanup()
+            return
+
+        # One batched flush of all staged content before anything becomes visible
+        for staged_path in self._staged.values():
+            _fsync_path(staged_path)
+
+        # _cleanup() below forgets the staged targets, so collect their directories first
+        directories = {target.parent for target in self._staged}
+        backup_dir = self._staging_dir / 'backup'
+        backup_dir.mkdir()
+        applied = []  # (target, backup or None)
+        try:
+            for index, (target, staged_path) in enumerate(self._staged.items()):
+                target.parent.mkdir(parents=True, exist_ok=True)
+                backup = None
+                if target.exists():
+                    backup = backup_dir / f"{index}.bak"
+                    _link_or_copy(target, backup)
+                os.replace(staged_path, target)
+                applied.append((target, backup))
+        except Exception:
+            # Undo the renames that already happened, newest first
+            for target, backup in reversed(applied):
+                if backup is not None:
+                    os.replace(backup, target)
+                else:
+                    target.unlink(missing_ok=True)
+            raise
+        finally:
+            for target, _ in applied:
+                file_cache.invalidate(target)
+            self._cleanup()
+
+        for directory in directories:
+            _fsync_path(directory)
+
+    def _read_current(self, target: Path) -> Optional[str]:
+        staged_path = self._staged.get(target)
+        source = staged_path if staged_path is not None else target
+        if not source.exists():
+            return None
+        with open(source, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def _cleanup(self):
+        if self._staging_dir is not None:
+            shutil.rmtree(self._staging_dir, ignore_errors=True)
+            self._staging_dir = None
+        self._staged = {}
+
+
+def sweep_stale_staging_dirs(root: Path, max_age: float = STALE_STAGING_SECONDS, force: bool = False) -> int:
+    """
+    Remove staging directories left in root by runs that were killed mid-transaction.
+
+    Runs once per root and process unless force is set; directories modified within
+    max_age seconds may belong to a live transaction and are kept.
+
+    Args:
+        root: Transaction root to clean
+        max_age: Minimum age in seconds of a directory to remove
+        force: Sweep even if root was already swept by this process
+
+    Returns:
+        Number of directories removed
+    """
+    root = Path(root)
+    with _swept_lock:
+        if root in _swept_roots and not force:
+            return 0
+        _swept_roots.add(root)
+
+    removed = 0
+    cutoff = time.time() - max_age
+    try:
+        with os.scandir(root) as it:
+            entries = [entry for entry in it if entry.name.startswith(STAGING_PREFIX)]
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False) and entry.stat(follow_symlinks=False).st_mtime < cutoff:
+                shutil.rmtree(entry.path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _fsync_path(path: Path):
+    """fsync a file or (on POSIX) a directory so renames into it are durable."""
+    if path.is_dir() and os.name == 'nt':
+        # Windows cannot open directories for fsync
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _link_or_copy(source: Path, destination: Path):
+    """Keep a backup of source, by hardlink when possible (no data copied)."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
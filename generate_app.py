@@ -48,12 +48,14 @@ class ProgressIndicator:
             i += 1
 
 
-def main(verbose: bool = False):
+def main(verbose: bool = False, install_deps: bool = False, incremental: bool = False):
     """
     Generate React app using template-based approach with smolagents.
     
     Args:
         verbose: If True, show detailed progress and agent steps
+        install_deps: If True, install dependencies offline from the shared pnpm store
+        incremental: If True, update an existing app in place and keep edited files
     """
     
     # Create app specification
@@ -81,7 +83,9 @@ def main(verbose: bool = False):
             version=app_spec.version,
             template_name=app_spec.template_name,
             output_dir=app_spec.output_dir,
-            custom_content=app_spec.custom_content
+            custom_content=app_spec.custom_content,
+            install_deps=install_deps,
+            incremental=incremental
         )
         print(f"✅ {template_result}")
     except Exception as e:
@@ -138,7 +142,10 @@ For now, the base template is complete and ready to use.
     
     print("✅ App generation completed!")
     print(f"🎯 Your app is ready in: {app_spec.output_dir}/{app_spec.app_name}")
-    print(f"🏃 To run: cd {app_spec.output_dir}/{app_spec.app_name} && npm install && npm run dev")
+    if install_deps:
+        print(f"🏃 To run: cd {app_spec.output_dir}/{app_spec.app_name} && pnpm dev")
+    else:
+        print(f"🏃 To run: cd {app_spec.output_dir}/{app_spec.app_name} && npm install && npm run dev")
     
     if verbose:
         print()
@@ -159,4 +166,6 @@ For now, the base template is complete and ready to use.
 if __name__ == "__main__":
     # Check for verbose flag
     verbose_mode = "--verbose" in sys.argv or "-v" in sys.argv
-    main(verbose=verbose_mode)
\ No newline at end of file
+    # --install links node_modules from the shared offline pnpm store (see dependency_store.py)
+    # --incremental updates an existing app in place instead of recreating it
+    main(verbose=verbose_mode, install_deps="--install" in sys.argv, incremental="--incremental" in sys.argv)
\ No newline at end of file
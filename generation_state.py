@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from atomic_io import atomic_write_text
+
+# Kept inside every generated app; never part of a template
+STATE_DIR = ".vibecoder"
+STATE_FILE = "generation.json"
+
+_hash_cache: dict[str, tuple[tuple[int, int], str]] = {}
+_hash_cache_lock = threading.Lock()
+
+
+def hash_text(text: str) -> str:
+    """sha256 hex digest of text encoded as UTF-8."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """
+    sha256 hex digest of a file, reusing the previous digest while (mtime_ns, size) is unchanged.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest
+    """
+    st = os.stat(path)
+    key = str(path)
+    validator = (st.st_mtime_ns, st.st_size)
+    with _hash_cache_lock:
+        cached = _hash_cache.get(key)
+        if cached is not None and cached[0] == validator:
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _hash_cache_lock:
+        _hash_cache[key] = (validator, value)
+    return value
+
+
+class GenerationState:
+    """What the generator last wrote into an app directory.
+
+    For every file that came from the template it remembers the sha256 of the
+    content written plus the file's (mtime_ns, size) right after writing. A file
+    whose stat is unchanged is known to be untouched without reading it; one
+    whose content hash differs was edited after generation (e.g. by an agent).
+    """
+
+    def __init__(self, output_path: Path, template_name: str, files: Optional[dict] = None):
+        """
+        Args:
+            output_path: App directory the state belongs to
+            template_name: Template the app was generated from
+            files: relative path -> {"sha256", "mtime_ns", "size"}
+        """
+        self.output_path = Path(output_path)
+        self.template_name = template_name
+        self.files: dict[str, dict] = files or {}
+
+    @property
+    def path(self) -> Path:
+        return self.output_path / STATE_DIR / STATE_FILE
+
+    @classmethod
+    def load(cls, output_path: Path) -> Optional["GenerationState"]:
+        """Read the state of an app directory, or None if it was never recorded (or is unreadable)."""
+        state_path = Path(output_path) / STATE_DIR / STATE_FILE
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return cls(output_path, data.get("template_name", ""), data.get("files", {}))
+
+    def record(self, relative: str, sha256: str):
+        """Remember that relative was just written with content hashing to sha256."""
+        st = os.stat(self.output_path / relative)
+        self.files[relative] = {"sha256": sha256, "mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+    def forget(self, relative: str):
+        self.files.pop(relative, None)
+
+    def recorded_hash(self, relative: str) -> Optional[str]:
+        entry = self.files.get(relative)
+        return entry["sha256"] if entry else None
+
+    def is_untouched(self, relative: str) -> bool:
+        """True if relative still holds exactly what the generator wrote."""
+        entry = self.files.get(relative)
+        path = self.output_path / relative
+        if entry is None:
+            return False
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if (st.st_mtime_ns, st.st_size) == (entry["mtime_ns"], entry["size"]):
+            return True
+        return st.st_size == entry["size"] and hash_file(path) == entry["sha256"]
+
+    def save(self):
+        """Write the state atomically next to the app's files."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"template_name": self.template_name, "files": self.files}
+        atomic_write_text(self.path, json.dumps(data, indent=2, sort_keys=True))
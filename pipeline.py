@@ -0,0 +1,377 @@
+"""
+Declarative runner for multi-agent pipelines.
+
+Every Stage declares the stages it depends on, the project artifacts it reads and
+writes, how to build its model, agent and tools, and its retry policy. A Pipeline
+orders the stages from their dependencies, starts each stage as soon as everything
+it depends on has finished (independent stages run concurrently) and times every
+stage:
+
+    pipeline = Pipeline([prd, ui, implementation, validation, qa, auto_fix])
+    results = pipeline.run(load_prompt, workspace=CurrentDirectoryWorkspace)
+    print(format_timings(results, pipeline.seconds))
+
+As in the hand-written pipelines it replaces, a stage that exhausts its retries is
+reported as failed but does not stop the stages after it. An exception raised by a
+stage's prepare hook aborts the whole run.
+
+Given run_inputs, completed stages are checkpointed in the project (see
+pipeline_checkpoint.py); running the same inputs again skips every stage that is
+still up to date and resumes at the first stale one.
+"""
+import copy
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Optional
+
+from generation_state import hash_text
+from pipeline_checkpoint import PipelineCheckpoint
+from retry_policy import RetryPolicy
+from stage_cache import project_state, stage_key
+
+STAGE_STATUSES = ("completed", "restored", "up_to_date", "failed", "skipped")
+
+
+@dataclass
+class Stage:
+    """One agent run of a pipeline."""
+    name: str
+    label: str  # shown in progress messages, e.g. "UI Agent"
+    prompt: str  # agent prompt name, resolved with the pipeline's load_prompt
+    agent_type: Callable[..., Any]  # CodeAgent, ToolCallingAgent, ...
+    model: Callable[[], Any]  # factory, so a skipped stage never creates a client
+    tools: list
+    depends_on: tuple = ()
+    # Project-relative paths the stage reads and is expected to produce
+    inputs: tuple = ()
+    outputs: tuple = ()
+    agent_options: dict = field(default_factory=dict)
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    # Give the stage a workspace of its own and run every attempt in its write transaction, so a
+    # failed attempt leaves the project untouched and concurrent stages don't see each other's
+    # half-done writes. The file tools read staged files; tools that read the disk directly must
+    # be listed in direct_io_tools.
+    transactional: bool = False
+    # Names of the stage's tools that read or write project files without the file tools. In a
+    # transactional stage the writes staged so far are committed before each call, so the tool
+    # sees them; a failure after that only rolls back what was written since.
+    direct_io_tools: tuple = ()
+    # Output may be restored from (and is stored in) the stage cache. Keyed by the run fingerprint
+    # and the inputs produced by other cacheable stages; inputs written fresh by an agent every
+    # run (PRD.md) are left out, or the cache could only hit in the project that stored it.
+    cacheable: bool = False
+    # Called once before the first attempt
+    prepare: Optional[Callable[[], None]] = None
+    # Checked when the stage becomes ready; the stage is skipped if it returns False
+    condition: Optional[Callable[[], bool]] = None
+
+
+@dataclass
+class StageResult:
+    """Outcome and timing of one stage."""
+    name: str
+    status: str  # one of STAGE_STATUSES
+    attempts: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+
+class Pipeline:
+    """A dependency graph of stages."""
+
+    def __init__(self, stages: list[Stage]):
+        """
+        Args:
+            stages: The stages; each may only depend on stages in this list
+
+        Raises:
+            ValueError: On duplicate names, unknown dependencies or a dependency cycle
+        """
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name '{stage.name}'")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            unknown = [name for name in stage.depends_on if name not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {', '.join(unknown)}")
+        self.order = self._topological_order()
+        # Every artifact any stage reads or writes, snapshotted by checkpoints
+        self.artifacts = tuple(sorted({relative for stage in stages for relative in (*stage.inputs, *stage.outputs)}))
+        # Outputs of cacheable stages are reproducible (restored from the cache); everything else an
+        # agent writes differs from run to run and must not be part of a cache key
+        self._cached_outputs = {relative for stage in stages if stage.cacheable for relative in stage.outputs}
+        self.seconds = 0.0
+
+    def run(
+        self,
+        load_prompt: Callable[[str], str],
+        workspace: Optional[Callable[[], Any]] = None,
+        project_dir: Optional[Callable[[], Optional[Path]]] = None,
+        stage_cache=None,
+        cache_key: Optional[Callable[[], Optional[str]]] = None,
+        run_inputs: Optional[dict] = None,
+        max_workers: Optional[int] = None,
+    ) -> dict[str, StageResult]:
+        """
+        Run every stage once its dependencies have finished.
+
+        Args:
+            load_prompt: Prompt name -> task text
+            workspace: Workspace factory (e.g. CurrentDirectoryWorkspace). Every transactional stage gets
+                a new workspace; its file tools are replaced by ones bound to that workspace and each
+                attempt runs in the workspace's write transaction.
+            project_dir: Returns the project folder the stages work in (used for outputs and the cache)
+            stage_cache: StageCache to restore and store cacheable stages
+            cache_key: Returns the run fingerprint, or None to bypass the cache
+            run_inputs: Name -> hash of what the run depends on outside the project (e.g. the user's
+                requirements). Enables checkpointing: stages still up to date from an earlier run with the
+                same run_inputs are skipped.
+            max_workers: Maximum number of concurrently running stages (default: all ready stages)
+
+        Returns:
+            Stage name -> StageResult, in pipeline order
+        """
+        started = time.perf_counter()
+        context = _RunContext(load_prompt, workspace, project_dir, stage_cache, cache_key, run_inputs)
+        waiting_on = {name: set(self.stages[name].depends_on) for name in self.order}
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers or len(self.order) or 1,
+                                thread_name_prefix="stage") as pool:
+            running = {}
+            while waiting_on or running:
+                for name in [name for name in self.order if name in waiting_on and not waiting_on[name]]:
+                    del waiting_on[name]
+                    running[pool.submit(self._run_stage, self.stages[name], context)] = name
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    # A prepare hook failure propagates; the pool waits for stages already running
+                    results[name] = future.result()
+                    for dependencies in waiting_on.values():
+                        dependencies.discard(name)
+        self.seconds = time.perf_counter() - started
+        return {name: results[name] for name in self.order if name in results}
+
+    # Internal helpers
+    def _topological_order(self) -> list[str]:
+        """Stage names with every stage after its dependencies, otherwise in definition order."""
+        order, visiting, visited = [], set(), set()
+
+        def visit(name, path):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage dependency cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def _run_stage(self, stage: Stage, context: "_RunContext") -> StageResult:
+        started = time.perf_counter()
+        result = StageResult(stage.name, "skipped")
+        number = self.order.index(stage.name) + 1
+
+        task = context.load_prompt(stage.prompt)
+        prompt_hash = hash_text(task)
+        project_dir = context.project_folder()
+        checkpoint = context.checkpoint(project_dir)
+        # A stage whose dependency ran again in this run is stale, whatever its checkpoint says
+        if (checkpoint is not None and not context.ran.intersection(stage.depends_on)
+                and checkpoint.is_current(stage.name, prompt_hash, (*stage.inputs, *stage.outputs))):
+            print(f"{number}. {stage.label} is up to date (checkpoint), skipping")
+            result.status = "up_to_date"
+            result.seconds = round(time.perf_counter() - started, 3)
+            return result
+
+        if stage.condition is not None and not stage.condition():
+            print(f"{number}. {stage.label} skipped")
+            result.seconds = round(time.perf_counter() - started, 3)
+            return result
+        context.ran.add(stage.name)
+        if stage.prepare is not None:
+            stage.prepare()
+
+        fingerprint = context.fingerprint() if stage.cacheable else None
+        # Keyed by the inputs other cacheable stages produced too, so e.g. an implementation is only
+        # restored onto the UI it was built on
+        cache_inputs = tuple(relative for relative in stage.inputs if relative in self._cached_outputs)
+        cache_key = stage_key(fingerprint, project_dir, cache_inputs) if fingerprint and project_dir else None
+        if cache_key and context.stage_cache.restore(cache_key, stage.name, project_dir):
+            print(f"{number}. {stage.label} restored from cache (same spec, template, prompts and inputs)")
+            result.status = "restored"
+            self._checkpoint(stage, context, prompt_hash, result)
+            result.seconds = round(time.perf_counter() - started, 3)
+            return result
+
+        # Only what the stage changes is cached, not the files it found
+        before = project_state(project_dir) if cache_key else None
+        tools, transaction = stage.tools, None
+        if stage.transactional and context.workspace is not None:
+            tools, transaction = _isolated_tools(stage.tools, context.workspace(), stage.direct_io_tools)
+        agent = stage.agent_type(tools=tools, model=stage.model(), **stage.agent_options)
+        print(f"{number}. {stage.label} is starting")
+        policy = stage.retry
+        slept = 0.0
+        for attempt in range(1, policy.max_attempts + 1):
+            result.attempts = attempt
+            try:
+                print(f"{stage.label} attempt {attempt}/{policy.max_attempts}")
+                if transaction is not None:
+                    with transaction():
+                        agent.run(task)
+                else:
+                    agent.run(task)
+                print(f"{stage.label} completed successfully")
+                result.status, result.error = "completed", ""
+                break
+            except Exception as e:
+                print(f"{stage.label} attempt {attempt} failed: {e}")
+                print(f"Error type: {type(e).__name__}")
+                result.status, result.error = "failed", f"{type(e).__name__}: {e}"
+                delay = policy.next_delay(attempt, e, slept)
+                if delay is None:
+                    reason = policy.describe_stop(attempt, e, slept)
+                    print(f"{stage.label} gave up ({reason}). Continuing with the next stages...")
+                    break
+                print(f"Retryable error. Waiting {delay:.1f} seconds before retry...")
+                time.sleep(delay)
+                slept += delay
+
+        # The PRD stage creates the project, so look it up again
+        project_dir = context.project_folder()
+        self._checkpoint(stage, context, prompt_hash, result)
+        if result.status == "completed" and project_dir is not None:
+            missing = [relative for relative in stage.outputs if not (project_dir / relative).exists()]
+            if missing:
+                print(f"Warning: {stage.label} did not produce {', '.join(missing)}")
+            if cache_key:
+                context.stage_cache.store_safely(cache_key, stage.name, project_dir, before)
+        result.seconds = round(time.perf_counter() - started, 3)
+        return result
+
+    def _checkpoint(self, stage: Stage, context: "_RunContext", prompt_hash: str, result: StageResult):
+        """Record a finished stage in the project's checkpoint, or drop it if the stage failed or was skipped."""
+        checkpoint = context.checkpoint(context.project_folder())
+        if checkpoint is None:
+            return
+        if result.status in ("completed", "restored"):
+            checkpoint.record(stage.name, prompt_hash, stage.inputs, stage.outputs, self.artifacts)
+        else:
+            checkpoint.forget(stage.name, self.artifacts)
+
+
+def _isolated_tools(tools: list, workspace, direct_io_tools: tuple) -> tuple[list, Callable[[], ContextManager]]:
+    """
+    Bind tools to workspace and return them with its transaction.
+
+    The file tools are swapped for ones bound to workspace; the direct_io_tools flush the
+    workspace's transaction before they run.
+    """
+    from am_tools import make_file_tools
+
+    own = {tool.name: tool for tool in make_file_tools(workspace)}
+    isolated = []
+    for tool in tools:
+        if tool.name in own:
+            tool = own[tool.name]
+        elif tool.name in direct_io_tools:
+            tool = _flushing_tool(tool, workspace)
+        isolated.append(tool)
+    return isolated, workspace.write_transaction
+
+
+def _flushing_tool(tool, workspace):
+    """A copy of tool that commits the writes staged in workspace before every call."""
+    flushing = copy.copy(tool)
+    forward = tool.forward
+
+    @wraps(forward)
+    def flushing_forward(*args, **kwargs):
+        transaction = workspace.active_transaction()
+        if transaction is not None:
+            transaction.flush()
+        return forward(*args, **kwargs)
+
+    flushing.forward = flushing_forward
+    return flushing
+
+
+class _RunContext:
+    """Per-run settings shared by the stage threads."""
+
+    def __init__(self, load_prompt, workspace, project_dir, stage_cache, cache_key, run_inputs):
+        self.load_prompt = load_prompt
+        self.workspace = workspace
+        self.stage_cache = stage_cache
+        self._project_dir = project_dir
+        self._cache_key = cache_key if stage_cache is not None else None
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._fingerprint_known = False
+        self._run_inputs = run_inputs
+        self._checkpoints: dict[Path, PipelineCheckpoint] = {}
+        # Stages that actually ran (or were restored) in this run
+        self.ran: set[str] = set()
+
+    def project_folder(self) -> Optional[Path]:
+        if self._project_dir is None:
+            return None
+        try:
+            folder = self._project_dir()
+        except Exception:
+            return None
+        return Path(folder) if folder else None
+
+    def checkpoint(self, project_dir: Optional[Path]) -> Optional[PipelineCheckpoint]:
+        """The checkpoint of project_dir, loaded once per run; None without run_inputs or a project."""
+        if self._run_inputs is None or project_dir is None:
+            return None
+        with self._lock:
+            checkpoint = self._checkpoints.get(project_dir)
+            if checkpoint is None:
+                checkpoint = self._checkpoints[project_dir] = PipelineCheckpoint.load(project_dir, self._run_inputs)
+            return checkpoint
+
+    def fingerprint(self) -> Optional[str]:
+        """The run fingerprint, computed once when the first cacheable stage needs it."""
+        if self._cache_key is None:
+            return None
+        with self._lock:
+            if not self._fingerprint_known:
+                try:
+                    self._fingerprint = self._cache_key()
+                except Exception as e:
+                    print(f"Stage cache disabled for this run: {e}")
+                    self._fingerprint = None
+                self._fingerprint_known = True
+                if self._fingerprint:
+                    print(f"Run fingerprint: {self._fingerprint[:12]}")
+            return self._fingerprint
+
+
+def format_timings(results: dict[str, StageResult], wall_seconds: float) -> str:
+    """Per-stage timing table plus totals."""
+    lines = [f"{'stage':<20}{'status':<11}{'attempts':>8}{'seconds':>10}"]
+    for r in results.values():
+        lines.append(f"{r.name:<20}{r.status:<11}{r.attempts:>8}{r.seconds:>10.2f}")
+    lines.append(
+        f"Pipeline: {len(results)} stages in {wall_seconds:.2f}s "
+        f"(sum of stage time {sum(r.seconds for r in results.values()):.2f}s)"
+    )
+    for r in results.values():
+        if r.status == "failed":
+            lines.append(f"❌ {r.name}: {r.error}")
+    return "\n".join(lines)
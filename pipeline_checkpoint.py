@@ -0,0 +1,177 @@
+"""
+Per-project record of completed pipeline stages, for resuming interrupted runs.
+
+<project>/.vibecoder/pipeline.json remembers the run inputs (e.g. the hash of the
+user's requirements) and, for every stage that completed, the hash of its prompt
+and of the artifacts it read and produced. It also keeps the hashes of all
+pipeline artifacts as they were after the last stage that completed or failed. When
+the same run is started again, a stage is skipped while its prompt is unchanged and
+none of its artifacts changed since then; the first stale stage and everything after
+it run again. A failed stage is forgotten but its partial edits join the baseline, so
+e.g. an auto fix run that edited ui/ and then failed resumes at auto fix, not at ui.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from atomic_io import atomic_write_text
+from code_search import scan_files
+from generation_state import STATE_DIR, hash_file
+
+CHECKPOINT_FILE = "pipeline.json"
+# Bump when the layout changes; older checkpoints are ignored
+CHECKPOINT_VERSION = 1
+
+
+def artifact_hash(project_dir: Path, relative: str) -> Optional[str]:
+    """
+    sha256 of a project artifact: a file's content, or every file path and hash of a directory.
+
+    Returns:
+        Hex digest, or None if the artifact does not exist
+    """
+    path = Path(project_dir) / relative
+    if path.is_file():
+        return hash_file(path)
+    if not path.is_dir():
+        return None
+    digest = hashlib.sha256()
+    for child, entry in scan_files(path):
+        digest.update(f"{child}\0{hash_file(Path(entry.path))}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class PipelineCheckpoint:
+    """Which stages of a run completed in one project directory, and what they left behind."""
+
+    def __init__(self, project_dir: Path, run_inputs: dict, stages: Optional[dict] = None,
+                 artifacts: Optional[dict] = None):
+        """
+        Args:
+            project_dir: Project the stages worked in
+            run_inputs: Name -> hash of everything outside the project the run depends on
+            stages: Stage name -> {"prompt", "inputs", "outputs", "completed_at"}
+            artifacts: Artifact path -> hash after the last recorded stage
+        """
+        self.project_dir = Path(project_dir)
+        self.run_inputs = dict(run_inputs)
+        self.stages: dict[str, dict] = stages or {}
+        self.artifacts: dict[str, Optional[str]] = artifacts or {}
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self.project_dir / STATE_DIR / CHECKPOINT_FILE
+
+    @classmethod
+    def load(cls, project_dir: Path, run_inputs: dict) -> "PipelineCheckpoint":
+        """Read the checkpoint of project_dir; one for other run inputs (or none at all) starts empty."""
+        try:
+            with open(Path(project_dir) / STATE_DIR / CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        if data.get("version") != CHECKPOINT_VERSION or data.get("run_inputs") != run_inputs:
+            return cls(project_dir, run_inputs)
+        return cls(project_dir, run_inputs, data.get("stages", {}), data.get("artifacts", {}))
+
+    def is_current(self, stage: str, prompt_hash: str, artifacts: tuple) -> bool:
+        """
+        True if stage completed with this prompt and none of its artifacts changed since the last recorded stage.
+
+        Args:
+            stage: Stage name
+            prompt_hash: Hash of the stage's current prompt
+            artifacts: The stage's input and output paths
+        """
+        entry = self.stages.get(stage)
+        if entry is None or entry.get("prompt") != prompt_hash:
+            return False
+        return all(artifact_hash(self.project_dir, relative) == self.artifacts.get(relative)
+                   for relative in artifacts)
+
+    def record(self, stage: str, prompt_hash: str, inputs: tuple, outputs: tuple, all_artifacts: tuple):
+        """
+        Remember that stage completed and save the checkpoint.
+
+        Args:
+            stage: Stage name
+            prompt_hash: Hash of the prompt it ran with
+            inputs: Artifacts the stage reads
+            outputs: Artifacts the stage produces
+            all_artifacts: Every artifact of the pipeline, snapshotted as the new baseline
+        """
+        hashes = {relative: artifact_hash(self.project_dir, relative) for relative in all_artifacts}
+        with self._lock:
+            self.stages[stage] = {
+                "prompt": prompt_hash,
+                "inputs": {relative: hashes[relative] for relative in inputs},
+                "outputs": {relative: hashes[relative] for relative in outputs},
+                "completed_at": datetime.now().isoformat(timespec='seconds'),
+            }
+            self.artifacts = hashes
+            self._save()
+
+    def forget(self, stage: str, all_artifacts: tuple = ()):
+        """
+        Mark stage as not completed (e.g. after it failed) and save the checkpoint.
+
+        Whatever the stage changed before it stopped becomes the new baseline, so only the
+        stage itself runs again, not the earlier stages whose artifacts it edited.
+
+        Args:
+            stage: Stage name
+            all_artifacts: Every artifact of the pipeline, snapshotted as the new baseline
+        """
+        hashes = {relative: artifact_hash(self.project_dir, relative) for relative in all_artifacts}
+        with self._lock:
+            removed = self.stages.pop(stage, None) is not None
+            if hashes and hashes != self.artifacts:
+                self.artifacts = hashes
+            elif not removed:
+                return
+            self._save()
+
+    def _save(self):
+        """Write the checkpoint atomically; a read-only project just can't be resumed."""
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "run_inputs": self.run_inputs,
+            "stages": self.stages,
+            "artifacts": self.artifacts,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(self.path, json.dumps(data, indent=2, sort_keys=True))
+        except OSError:
+            pass
+
+
+def find_checkpointed_project(base_dir: Path, run_inputs: dict) -> Optional[Path]:
+    """
+    Find the project a previous run with the same inputs worked in.
+
+    Args:
+        base_dir: Directory holding one sub-directory per project
+        run_inputs: Name -> hash of the run's inputs
+
+    Returns:
+        The most recently checkpointed matching project, or None
+    """
+    best, best_mtime = None, -1
+    base_dir = Path(base_dir)
+    if not base_dir.is_dir():
+        return None
+    for checkpoint_path in base_dir.glob(f"*/{STATE_DIR}/{CHECKPOINT_FILE}"):
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            mtime = checkpoint_path.stat().st_mtime_ns
+        except (OSError, json.JSONDecodeError):
+            continue
+        if data.get("version") == CHECKPOINT_VERSION and data.get("run_inputs") == run_inputs and mtime > best_mtime:
+            best, best_mtime = checkpoint_path.parent.parent, mtime
+    return best
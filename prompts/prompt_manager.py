@@ -1,18 +1,132 @@
+import hashlib
 import os
+import threading
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
-from jinja2 import Environment, FileSystemLoader, Template
+from typing import Dict, List, Optional
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, meta
+
+# tiktoken is optional (pip install 'vibecoder[tokenizer]'): without it tokens are
+# estimated from the character count
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Compiled templates are shared by every process (generation subprocesses, batch workers).
+# Can be overridden with the VIBECODER_JINJA_CACHE environment variable.
+DEFAULT_BYTECODE_CACHE_DIR = Path.home() / ".cache" / "vibecoder" / "jinja"
+
+# Encoding used when tiktoken is installed; close enough for GPT and Gemini budgets
+TIKTOKEN_ENCODING = "cl100k_base"
+# Fallback estimate, same heuristic as the workspace read budgets
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+# Set when tiktoken is installed but its encoding couldn't be loaded (it is downloaded on first use)
+_encoding_error: Optional[Exception] = None
+
+
+def _get_encoding():
+    """The tiktoken encoding, or None to fall back to the estimate."""
+    global _encoding, _encoding_error
+    if tiktoken is None or _encoding_error is not None:
+        return None
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+        except Exception as e:
+            _encoding_error = e
+            return None
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of text with tiktoken if it is installed, otherwise estimate them.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Token count
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def tokenizer_name() -> str:
+    """Name of the tokenizer count_tokens() uses, for logs."""
+    if _get_encoding() is not None:
+        return f"tiktoken/{TIKTOKEN_ENCODING}"
+    return f"estimate ({CHARS_PER_TOKEN} chars/token)"
+
+
+@dataclass
+class PromptParts:
+    """A prompt split into a static prefix (identical for every app) and a dynamic suffix.
+    
+    Send text to the model unchanged: providers cache the longest common prefix, so
+    runs that share prefix_hash only pay full price for the suffix.
+    """
+    prefix: str
+    suffix: str
+    prefix_hash: str
+    
+    @property
+    def text(self) -> str:
+        return f"{self.prefix}\n\n{self.suffix}"
+
+
+@dataclass
+class RenderedPrompt:
+    """A rendered prompt plus its size, as returned by render_main_prompt_budgeted()."""
+    text: str
+    tokens: int
+    max_tokens: int
+    tokenizer: str
+    # What had to be cut to fit, in the order it was applied
+    trimmed: List[str] = field(default_factory=list)
+    # sha256 of the static prefix (see PromptParts)
+    prefix_hash: str = ""
+    
+    @property
+    def chars(self) -> int:
+        return len(self.text)
+    
+    @property
+    def fits(self) -> bool:
+        return self.tokens <= self.max_tokens
+    
+    def summary(self) -> str:
+        """One line for the pipeline log."""
+        line = f"{self.tokens}/{self.max_tokens} tokens, {self.chars} chars ({self.tokenizer})"
+        if self.prefix_hash:
+            line += f", prefix {self.prefix_hash[:12]}"
+        if self.trimmed:
+            line += "; trimmed: " + "; ".join(self.trimmed)
+        if not self.fits:
+            line += "; still over budget"
+        return line
 
 
 class PromptManager:
     """Manages Jinja2 prompt templates for VibeCoder app generation."""
     
-    def __init__(self, templates_dir: Optional[str] = None):
+    def __init__(self, templates_dir: Optional[str] = None, bytecode_cache_dir: Optional[str] = None):
         """
         Initialize the prompt manager with Jinja2 environment.
         
+        Prefer get_prompt_manager(), which shares one instance (and its parsed
+        templates) per templates directory.
+        
         Args:
             templates_dir: Custom templates directory path. If None, uses prompts/templates/
+            bytecode_cache_dir: Where compiled templates are cached on disk. If None, uses
+                VIBECODER_JINJA_CACHE or ~/.cache/vibecoder/jinja
         """
         if templates_dir is None:
             # Get the directory where this file is located
@@ -29,8 +143,17 @@ class PromptManager:
             loader=FileSystemLoader(str(self.templates_dir)),
             trim_blocks=True,
             lstrip_blocks=True,
-            autoescape=False  # We're generating code, not HTML
+            autoescape=False,  # We're generating code, not HTML
+            # Templates are re-checked on every get_template() and recompiled when their mtime changes
+            auto_reload=True,
+            bytecode_cache=_bytecode_cache(bytecode_cache_dir),
         )
+        
+        # Render-time metrics per template: [renders, total seconds, last seconds]
+        self._render_stats: Dict[str, list] = {}
+        self._stats_lock = threading.Lock()
+        # Static prefix name -> (compiled Template it was rendered from, text, sha256)
+        self._static_prefixes: Dict[str, tuple] = {}
     
     def render_template(self, template_name: str, **kwargs) -> str:
         """
@@ -43,8 +166,44 @@ class PromptManager:
         Returns:
             Rendered template as string
         """
+        started = time.perf_counter()
         template = self.env.get_template(template_name)
-        return template.render(**kwargs)
+        rendered = template.render(**kwargs)
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            stats = self._render_stats.setdefault(template_name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = elapsed
+        return rendered
+    
+    def render_stats(self) -> Dict[str, dict]:
+        """
+        Render-time metrics per template (including template loading and compilation).
+        
+        Returns:
+            Template name -> {"renders", "total_ms", "avg_ms", "last_ms"}
+        """
+        with self._stats_lock:
+            return {
+                name: {
+                    "renders": count,
+                    "total_ms": round(total * 1000, 3),
+                    "avg_ms": round(total * 1000 / count, 3),
+                    "last_ms": round(last * 1000, 3),
+                }
+                for name, (count, total, last) in self._render_stats.items()
+            }
+    
+    def format_render_stats(self) -> str:
+        """Human readable one-line summary of the render metrics."""
+        stats = self.render_stats()
+        if not stats:
+            return "Prompt rendering: no renders"
+        return "Prompt rendering: " + ", ".join(
+            f"{name} {s['renders']}x avg {s['avg_ms']:.2f} ms (last {s['last_ms']:.2f} ms)"
+            for name, s in sorted(stats.items())
+        )
     
     def render_main_prompt(
         self, 
@@ -69,6 +228,25 @@ class PromptManager:
         Returns:
             Rendered prompt ready for CodeAgent
         """
+        return self.render_main_prompt_parts(
+            app_name, app_description, additional_requirements, tech_stack, feature_name, **kwargs
+        ).text
+    
+    def render_main_prompt_parts(
+        self, 
+        app_name: str,
+        app_description: str,
+        additional_requirements: Optional[List[str]] = None,
+        tech_stack: Optional[str] = None,
+        feature_name: Optional[str] = None,
+        **kwargs
+    ) -> PromptParts:
+        """
+        Render the main prompt as static prefix + dynamic suffix; see render_main_prompt.
+        
+        Returns:
+            PromptParts (prefix_hash is the same for every app until the template changes)
+        """
         template_vars = {
             'app_name': app_name,
             'app_description': app_description,
@@ -78,7 +256,133 @@ class PromptManager:
             **kwargs
         }
         
-        return self.render_template('main_prompt.j2', **template_vars)
+        return self.render_prompt_parts('main_prompt', **template_vars)
+    
+    def render_prompt_parts(self, base_name: str, **kwargs) -> PromptParts:
+        """
+        Render <base_name>_static.j2 as the prefix and <base_name>_dynamic.j2 as the suffix.
+        
+        The static template may not use any variables, so its output is byte-identical
+        across runs; it is rendered once and reused until the file changes.
+        
+        Args:
+            base_name: Template name without suffix (e.g. 'main_prompt')
+            **kwargs: Variables for the dynamic template
+            
+        Returns:
+            PromptParts
+            
+        Raises:
+            ValueError: If the static template references a variable
+        """
+        prefix, prefix_hash = self._render_static(f"{base_name}_static.j2")
+        suffix = self.render_template(f"{base_name}_dynamic.j2", **kwargs)
+        return PromptParts(prefix, suffix, prefix_hash)
+    
+    def render_main_prompt_budgeted(
+        self,
+        app_name: str,
+        app_description: str,
+        max_tokens: int,
+        additional_requirements: Optional[List[str]] = None,
+        tech_stack: Optional[str] = None,
+        feature_name: Optional[str] = None,
+        **kwargs
+    ) -> RenderedPrompt:
+        """
+        Render the main prompt within a token budget.
+        
+        Optional content is cut in this order until the prompt fits:
+        1. additional_requirements, dropped from the end (earlier ones are assumed more
+           important) and replaced by a note saying how many were omitted
+        2. app_description, shortened at a word boundary but never below its first word
+        The fixed guidelines of the template are never cut; if they alone exceed the
+        budget the description is kept whole. Either way a prompt that is still over
+        budget is returned with fits == False.
+        
+        Args:
+            app_name: Name of the application to generate
+            app_description: Description of what the app should do
+            max_tokens: Token budget for the whole prompt
+            additional_requirements: List of additional requirements
+            tech_stack: Technology stack description
+            feature_name: Main feature name
+            **kwargs: Additional template variables
+            
+        Returns:
+            RenderedPrompt with the text, its token count and what was trimmed
+        """
+        requirements = list(additional_requirements or [])
+        
+        prefix_hash = self._render_static('main_prompt_static.j2')[1]
+        
+        def render(description: str, kept: int) -> str:
+            shown = requirements[:kept]
+            if kept < len(requirements):
+                shown.append(f"({len(requirements) - kept} more requirements omitted to fit the prompt budget)")
+            return self.render_main_prompt(app_name, description, shown, tech_stack, feature_name, **kwargs)
+        
+        def result(text: str, trimmed: List[str]) -> RenderedPrompt:
+            return RenderedPrompt(text, count_tokens(text), max_tokens, tokenizer_name(), trimmed, prefix_hash)
+        
+        text = render(app_description, len(requirements))
+        if count_tokens(text) <= max_tokens:
+            return result(text, [])
+        
+        # 1. Keep the longest prefix of the requirements that fits (binary search, O(log n) renders)
+        trimmed = []
+        low, high = 0, len(requirements)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(render(app_description, middle)) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        if low < len(requirements):
+            trimmed.append(f"{len(requirements) - low} of {len(requirements)} additional requirements omitted")
+        text = render(app_description, low)
+        if count_tokens(text) <= max_tokens:
+            return result(text, trimmed)
+        
+        # 2. Shorten the description to the longest word-boundary prefix that fits
+        words = app_description.split()
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(render(" ".join(words[:middle]) + " …", 0)) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        if low == 0 and count_tokens(render(" …", 0)) > max_tokens:
+            # The fixed text alone is over budget: dropping the description wouldn't make it fit
+            return result(render(app_description, 0), trimmed)
+        # The model needs at least a hint of what to build; better a few tokens over budget
+        low = max(low, 1)
+        if low < len(words):
+            trimmed.append(f"description shortened from {len(words)} to {low} words")
+            description = " ".join(words[:low]) + " …"
+        else:
+            description = app_description
+        return result(render(description, 0), trimmed)
+    
+    def _render_static(self, template_name: str) -> tuple:
+        """Render a variable-free template once per version; returns (text, sha256)."""
+        template = self.env.get_template(template_name)  # a new object after the file changed
+        cached = self._static_prefixes.get(template_name)
+        if cached is not None and cached[0] is template:
+            return cached[1], cached[2]
+        
+        source, _, _ = self.env.loader.get_source(self.env, template_name)
+        variables = meta.find_undeclared_variables(self.env.parse(source))
+        if variables:
+            raise ValueError(
+                f"Static prompt template '{template_name}' must not use variables "
+                f"(found: {', '.join(sorted(variables))}); move them to the dynamic template"
+            )
+        text = self.render_template(template_name)
+        prefix_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        self._static_prefixes[template_name] = (template, text, prefix_hash)
+        return text, prefix_hash
     
     def list_templates(self) -> List[str]:
         """
@@ -95,6 +399,24 @@ class PromptManager:
             if f.is_file() and f.suffix in ['.j2', '.jinja', '.jinja2']
         ]
     
+    def template_hash(self, template_name: Optional[str] = None) -> str:
+        """
+        Content hash identifying a version of one prompt template, or of all of them.
+        
+        Args:
+            template_name: Template file to hash; None hashes every template (names and content)
+            
+        Returns:
+            sha256 hex digest
+        """
+        names = [template_name] if template_name else sorted(self.list_templates())
+        digest = hashlib.sha256()
+        for name in names:
+            source, _, _ = self.env.loader.get_source(self.env, name)
+            digest.update(f"{name}\0".encode('utf-8'))
+            digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+    
     def template_exists(self, template_name: str) -> bool:
         """
         Check if a template file exists.
@@ -109,9 +431,41 @@ class PromptManager:
         return template_path.exists() and template_path.is_file()
 
 
+def _bytecode_cache(directory: Optional[str]) -> Optional[FileSystemBytecodeCache]:
+    directory = Path(directory or os.environ.get('VIBECODER_JINJA_CACHE') or DEFAULT_BYTECODE_CACHE_DIR)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        # Read-only home (e.g. some containers): compile in memory only
+        return None
+    return FileSystemBytecodeCache(str(directory))
+
+
+_managers: Dict[Path, PromptManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_prompt_manager(templates_dir: Optional[str] = None) -> PromptManager:
+    """
+    Return the process-wide PromptManager for a templates directory, creating it on first use.
+    
+    Args:
+        templates_dir: Custom templates directory path. If None, uses prompts/templates/
+        
+    Returns:
+        The shared PromptManager
+    """
+    key = Path(templates_dir).resolve() if templates_dir else (Path(__file__).parent / "templates").resolve()
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = PromptManager(str(key))
+        return manager
+
+
 if __name__ == "__main__":
     # Example usage
-    pm = PromptManager()
+    pm = get_prompt_manager()
     
     # Example template rendering
     try:
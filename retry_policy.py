@@ -0,0 +1,166 @@
+"""
+Retry policy for model-backed stages: exponential backoff with full jitter,
+provider Retry-After hints, fail-fast on permanent errors and a budget for the
+total time spent waiting between attempts (the attempts themselves don't count,
+so a long agent run still gets its retries).
+
+    policy = RetryPolicy(max_attempts=3, base_delay=2, max_delay=60, max_total_delay=300)
+    slept = 0.0
+    for attempt in range(1, policy.max_attempts + 1):
+        try:
+            return run()
+        except Exception as e:
+            delay = policy.next_delay(attempt, e, slept)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            slept += delay
+"""
+import random
+import re
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+RETRYABLE_PATTERNS = (
+    'no choices',
+    'unexpected api response',
+    'rate limit',
+    'ratelimit',
+    'too many requests',
+    'resource exhausted',
+    'resource_exhausted',
+    'overloaded',
+    'timeout',
+    'timed out',
+    'connection',
+    'temporary',
+    'service unavailable',
+    'internal server error',
+)
+RETRYABLE_STATUS_CODES = (408, 409, 429, 500, 502, 503, 504)
+
+# "retry after 20 seconds", "Please retry in 12.5s", "retryDelay": "30s", "retry after 2 minutes"
+_RETRY_HINT_RE = re.compile(
+    r'retry(?:[ _-]?after|[ _-]?in|delay)["\']?\s*[:=]?\s*["\']?(\d+(?:\.\d+)?)\s*([a-z]*)',
+    re.IGNORECASE,
+)
+# Seconds per unit of a hint; a bare number is in seconds, like the Retry-After header
+_HINT_UNITS = {
+    '': 1.0,
+    **dict.fromkeys(('ms', 'msec', 'millisecond', 'milliseconds'), 0.001),
+    **dict.fromkeys(('s', 'sec', 'secs', 'second', 'seconds'), 1.0),
+    **dict.fromkeys(('m', 'min', 'mins', 'minute', 'minutes'), 60.0),
+    **dict.fromkeys(('h', 'hr', 'hrs', 'hour', 'hours'), 3600.0),
+}
+
+
+def _error_chain(error: BaseException):
+    """error and the exceptions it was raised from (agent errors wrap the provider's)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Check if an error is retryable (temporary API issues)"""
+    for cause in _error_chain(error):
+        if _status_code(cause) in RETRYABLE_STATUS_CODES:
+            return True
+        error_str = str(cause).lower()
+        if any(pattern in error_str for pattern in RETRYABLE_PATTERNS):
+            return True
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    The wait a provider asked for, from a Retry-After header or a hint in the error message.
+
+    Args:
+        error: The exception raised by the failed attempt
+
+    Returns:
+        Seconds to wait, or None if the error carries no hint
+    """
+    for cause in _error_chain(error):
+        headers = getattr(getattr(cause, 'response', None), 'headers', None)
+        if headers is not None:
+            value = headers.get('retry-after-ms')
+            if value is not None:
+                try:
+                    return max(0.0, float(value) / 1000)
+                except ValueError:
+                    pass
+            value = headers.get('retry-after')
+            if value is not None:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    try:
+                        # HTTP-date form
+                        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+                    except (TypeError, ValueError):
+                        pass
+        for match in _RETRY_HINT_RE.finditer(str(cause)):
+            # A number followed by anything else ("retry in 3 attempts") is not a wait
+            scale = _HINT_UNITS.get(match.group(2).lower())
+            if scale is not None:
+                return float(match.group(1)) * scale
+    return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a failed attempt."""
+    max_attempts: int = 3
+    base_delay: float = 2.0  # seconds, before the first retry (before jitter)
+    multiplier: float = 2.0
+    max_delay: float = 60.0  # cap of a single backoff wait
+    # Most seconds slept between the attempts of one stage, in total
+    max_total_delay: float = 300.0
+    retryable: Callable[[BaseException], bool] = is_retryable_error
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff after the given (1-based) failed attempt."""
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def next_delay(self, attempt: int, error: BaseException, slept: float) -> Optional[float]:
+        """
+        Decide whether to retry after a failed attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based)
+            error: Its exception
+            slept: Seconds already spent waiting before earlier retries
+
+        Returns:
+            Seconds to wait before the next attempt, or None to give up
+        """
+        if attempt >= self.max_attempts or not self.retryable(error):
+            return None
+        hint = retry_after_seconds(error)
+        # A provider hint is a minimum; waiting less would only fail again
+        delay = max(hint, self.backoff(attempt)) if hint is not None else self.backoff(attempt)
+        if slept + delay > self.max_total_delay:
+            return None
+        return delay
+
+    def describe_stop(self, attempt: int, error: BaseException, slept: float) -> str:
+        """Why next_delay() returned None, for progress messages."""
+        if attempt >= self.max_attempts:
+            return "all retries exhausted"
+        if not self.retryable(error):
+            return "non-retryable error"
+        return f"next wait would exceed the {self.max_total_delay:.0f}s retry wait budget ({slept:.0f}s used)"
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of pipeline stage outputs.
+
+A stage's output is the set of project files it created or changed. It is stored
+under a key combining the run's fingerprint (AppSpec.fingerprint over the spec, the
+template hash and the prompt versions) with the hashes of those of the stage's
+inputs that earlier cacheable stages produced, and the stage name. A later run with
+the same key, in any project, restores those files instead of running the agents again:
+
+    cache = get_stage_cache()
+    key = stage_key(fingerprint, project_dir, ())
+    if not cache.restore(key, "ui", project_dir):
+        before = project_state(project_dir)
+        run_ui_agent()
+        cache.store(key, "ui", project_dir, before)
+
+Inputs an agent writes fresh every run, like PRD.md, are deliberately not part of
+the key: two runs whose PRD agents produce the same canonical AppSpec share their UI
+and implementation even if the PRD wording differs. Restores only write the files the
+stage changed, so this run's PRD.md is kept.
+
+Bookkeeping under .vibecoder/ (generation and pipeline state) is never stored or restored.
+
+    python stage_cache.py stats
+    python stage_cache.py clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from pydantic import ValidationError
+
+from app_spec import AppSpec
+from code_search import scan_files
+from fast_copy import materialize_file
+from generation_state import STATE_DIR, hash_file, hash_text
+from pipeline_checkpoint import artifact_hash
+from prompts.prompt_manager import get_prompt_manager
+from template_registry import get_template_registry
+
+# Can be overridden with the VIBECODER_STAGE_CACHE environment variable
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "vibecoder" / "stages"
+SNAPSHOT_MANIFEST = "snapshot.json"
+
+
+class StageCache:
+    """Snapshots of project directories keyed by (fingerprint, stage)."""
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        Args:
+            cache_dir: Where snapshots are kept (default: VIBECODER_STAGE_CACHE or DEFAULT_CACHE_DIR)
+        """
+        self.cache_dir = Path(cache_dir or os.environ.get('VIBECODER_STAGE_CACHE') or DEFAULT_CACHE_DIR)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def snapshot_dir(self, fingerprint: str, stage: str) -> Path:
+        return self.cache_dir / fingerprint[:2] / fingerprint / stage
+
+    def has(self, fingerprint: str, stage: str) -> bool:
+        return (self.snapshot_dir(fingerprint, stage) / SNAPSHOT_MANIFEST).is_file()
+
+    def store(self, fingerprint: str, stage: str, project_dir: Path, before: Optional[dict] = None) -> int:
+        """
+        Save the files stage created or changed in project_dir as its output.
+
+        Dependency and build directories (node_modules, dist, ...) and STATE_DIR are
+        not stored. The snapshot only becomes visible once it is complete.
+
+        Args:
+            fingerprint: Stage key (see stage_key)
+            stage: Stage name (e.g. "prd", "ui", "implementation")
+            project_dir: Project directory after the stage finished
+            before: project_state() taken before the stage ran; None stores every file
+
+        Returns:
+            Number of files stored
+        """
+        project_dir = Path(project_dir)
+        target = self.snapshot_dir(fingerprint, stage)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{stage}.", dir=target.parent))
+        try:
+            files = {}
+            for relative, digest in project_state(project_dir).items():
+                if before is not None and before.get(relative) == digest:
+                    continue
+                # Reflink when possible, otherwise a real copy: never a hardlink into a live project
+                materialize_file(project_dir / relative, staging / "files" / relative, mode="reflink")
+                files[relative] = digest
+            with open(staging / SNAPSHOT_MANIFEST, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "stage": stage,
+                    "fingerprint": fingerprint,
+                    "stored_at": datetime.now().isoformat(timespec='seconds'),
+                    "files": files,
+                }, f, indent=2)
+            with self._lock:
+                if target.exists():
+                    shutil.rmtree(target)
+                os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return len(files)
+
+    def store_safely(self, fingerprint: str, stage: str, project_dir: Path, before: Optional[dict] = None) -> bool:
+        """store() for use inside a stage: a full disk or unreadable file must not fail the stage."""
+        try:
+            self.store(fingerprint, stage, project_dir, before)
+            return True
+        except OSError:
+            return False
+
+    def restore(self, fingerprint: str, stage: str, project_dir: Path) -> bool:
+        """
+        Recreate the stored output of stage in project_dir.
+
+        Files from the snapshot are written over the project; other files are left alone.
+
+        Args:
+            fingerprint: Stage key (see stage_key)
+            stage: Stage name
+            project_dir: Project directory to restore into
+
+        Returns:
+            True on a cache hit, False if there is no snapshot
+        """
+        source = self.snapshot_dir(fingerprint, stage)
+        try:
+            with open(source / SNAPSHOT_MANIFEST, 'r', encoding='utf-8') as f:
+                files = json.load(f)["files"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return False
+
+        project_dir = Path(project_dir)
+        for relative in files:
+            if _is_state_file(relative):
+                # Stored by an older version of the cache
+                continue
+            materialize_file(source / "files" / relative, project_dir / relative, mode="reflink")
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def clear(self):
+        """Remove every stored snapshot."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def format_stats(self) -> str:
+        return f"Stage cache: {self.hits} hits / {self.misses} misses ({self.cache_dir})"
+
+
+def project_state(project_dir: Path) -> dict[str, str]:
+    """Relative path -> sha256 of every cacheable file of project_dir (see StageCache.store)."""
+    return {
+        relative: hash_file(Path(entry.path))
+        for relative, entry in scan_files(Path(project_dir))
+        if not _is_state_file(relative)
+    }
+
+
+def stage_key(fingerprint: str, project_dir: Path, inputs: tuple) -> str:
+    """
+    Cache key of one stage: the run fingerprint plus the current hashes of the given inputs.
+
+    Only pass inputs that are reproducible for a given fingerprint (outputs of other cached
+    stages); an input that differs on every run means the key never matches again.
+
+    Args:
+        fingerprint: Run fingerprint (see run_fingerprint)
+        project_dir: Project directory
+        inputs: Project-relative paths of the stage's reproducible inputs
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256(fingerprint.encode('utf-8'))
+    for relative in sorted(inputs):
+        digest.update(f"\n{relative}\0{artifact_hash(project_dir, relative) or '-'}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _is_state_file(relative: str) -> bool:
+    return relative == STATE_DIR or relative.startswith(f"{STATE_DIR}/")
+
+
+def run_fingerprint(spec_path: Path, agent_prompts: dict[str, str]) -> Optional[str]:
+    """
+    Fingerprint of a pipeline run: its AppSpec, the template content and every prompt.
+
+    Args:
+        spec_path: app_spec.json written by the PRD stage
+        agent_prompts: Agent name -> prompt text used by the run
+
+    Returns:
+        The fingerprint, or None if the spec is missing or invalid (nothing should be cached then)
+    """
+    try:
+        with open(spec_path, 'r', encoding='utf-8') as f:
+            spec = AppSpec.model_validate(json.load(f))
+    except (OSError, json.JSONDecodeError, ValidationError):
+        return None
+
+    try:
+        template_hash = get_template_registry().get(spec.template_name).content_hash
+    except ValueError:
+        # Unknown template (the agent pipeline builds its UI without one): identify it by name only
+        template_hash = f"missing:{spec.template_name}"
+    prompt_versions = {name: hash_text(text) for name, text in agent_prompts.items()}
+    prompt_versions["prompt_templates"] = get_prompt_manager().template_hash()
+    return spec.fingerprint(template_hash, prompt_versions)
+
+
+_default_cache: Optional[StageCache] = None
+
+
+def get_stage_cache() -> StageCache:
+    """Return the process-wide stage cache at the default location."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = StageCache()
+    return _default_cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the pipeline stage cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    cli_args = parser.parse_args()
+
+    cache = get_stage_cache()
+    if cli_args.command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.cache_dir}")
+    else:
+        snapshots = list(cache.cache_dir.glob(f"*/*/*/{SNAPSHOT_MANIFEST}")) if cache.cache_dir.exists() else []
+        per_stage = {}
+        for manifest_path in snapshots:
+            per_stage[manifest_path.parent.name] = per_stage.get(manifest_path.parent.name, 0) + 1
+        print(f"{len(snapshots)} snapshots in {cache.cache_dir}")
+        for stage_name, count in sorted(per_stage.items()):
+            print(f"  {stage_name}: {count}")
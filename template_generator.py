@@ -1,8 +1,17 @@
+import io
 import shutil
-import os
-import json
+import tarfile
+import zipfile
 from pathlib import Path
+from typing import BinaryIO
 from app_spec import AppSpec
+from atomic_io import atomic_write_text
+from code_search import scan_files
+from dependency_store import get_dependency_store
+from fast_copy import materialize_file, materialize_tree
+from generation_state import GenerationState, hash_file, hash_text
+from template_manifest import MANIFEST_NAME, load_manifest
+from template_registry import TemplateInfo, get_template_registry
 
 
 def generate_app_from_template(
@@ -13,11 +22,17 @@ def generate_app_from_template(
     version: str = "0.1.0",
     template_name: str = "react-simple-spa",
     output_dir: str = "result",
-    custom_content: str = None
+    custom_content: str = None,
+    copy_mode: str = "auto",
+    install_deps: bool = False,
+    incremental: bool = False
 ) -> str:
     """
     Generate complete React app by copying template and setting parameters.
     
+    The files to parameterize and their placeholders come from the template's
+    template.json manifest (see template_manifest.py).
+    
     Args:
         app_name: Name of the app (kebab-case, used for directory/package name)
         display_name: Human-readable title for the app
@@ -27,6 +42,13 @@ def generate_app_from_template(
         template_name: Template to use (default: "react-simple-spa")
         output_dir: Where to generate the app (default: "result")
         custom_content: Custom JSX content for App.tsx (optional)
+        copy_mode: How unchanged template files are materialized: "auto" (reflink,
+            else copy), "reflink", "copy" or "hardlink" (opt-in only: the files share their
+            inode with the template, see fast_copy.materialize_tree) (default: "auto")
+        install_deps: Install node_modules offline from the shared pnpm store,
+            prewarming the store first if needed (default: False)
+        incremental: Update an existing app in place instead of recreating it;
+            files edited since the last generation are kept (default: False)
     
     Returns:
         Success message with generated app location
@@ -42,153 +64,233 @@ def generate_app_from_template(
         output_dir=output_dir,
         custom_content=custom_content
     )
+    return generate_app_from_spec(app_spec, copy_mode=copy_mode, install_deps=install_deps, incremental=incremental)
+
+
+def generate_app_from_spec(
+    app_spec: AppSpec,
+    copy_mode: str = "auto",
+    install_deps: bool = False,
+    incremental: bool = False
+) -> str:
+    """
+    Generate an app from an AppSpec; see generate_app_from_template for the details.
+    
+    Args:
+        app_spec: Specification of the app to generate
+        copy_mode: How unchanged template files are materialized (default: "auto")
+        install_deps: Install node_modules offline from the shared pnpm store (default: False)
+        incremental: If the app already exists, only rewrite template files whose
+            content changed and keep files edited since the last generation (default: False)
     
-    # 1. Copy template to output directory
-    template_path = Path("templates") / app_spec.template_name
+    Returns:
+        Success message with generated app location
+    """
+    # 1. Look the template up and load its manifest (both cached per process)
+    try:
+        template = get_template_registry().validate_spec(app_spec)
+    except ValueError as e:
+        return f"❌ {e}"
+    template_path = template.path
     output_path = Path(app_spec.output_dir) / app_spec.app_name
     
-    if not template_path.exists():
-        return f"❌ Template not found: {template_path}"
+    manifest = load_manifest(template_path)
+    # 2. Render every parameterized file in one pass (one read each, nothing written yet)
+    rendered = manifest.render(app_spec)
+    
+    if incremental and output_path.exists():
+        stats = _update_incrementally(template, output_path, rendered, copy_mode)
+        message = (
+            f"✅ Updated app '{app_spec.app_name}' in {output_path} "
+            f"({stats['written']} files rewritten, {stats['unchanged']} unchanged, "
+            f"{stats['kept']} edited files kept, {stats['removed']} removed)"
+        )
+    else:
+        if output_path.exists():
+            shutil.rmtree(output_path)  # Clean existing
+        
+        # 3. Materialize the rest of the template; unchanged files share the template's data
+        copy_stats = materialize_tree(
+            template_path,
+            output_path,
+            skip_files=[MANIFEST_NAME, *rendered],
+            mode=copy_mode,
+        )
+        
+        # 4. One write per parameterized file
+        for relative, content in rendered.items():
+            _write_rendered(template_path / relative, output_path / relative, content)
+        
+        # Remember what was written so a later incremental run can tell edited files apart. Template
+        # files are hashed in the registry index already; only the rendered text is hashed here.
+        state = GenerationState(output_path, template.name)
+        for relative, _ in _template_files(template_path):
+            state.record(relative, hash_text(rendered[relative]) if relative in rendered else template.file_hash(relative))
+        state.save()
+        
+        shared = copy_stats["reflinked"] + copy_stats["hardlinked"]
+        message = (
+            f"✅ Generated app '{app_spec.app_name}' in {output_path} "
+            f"({shared} files shared with the template, {copy_stats['copied'] + len(rendered)} written)"
+        )
+    
+    # 5. Optional: link node_modules from the shared offline store
+    if install_deps:
+        message += f"; {get_dependency_store().ensure_installed(output_path, template_path)}"
+    
+    return message
+
+
+ARCHIVE_FORMATS = ("zip", "tar", "tar.gz")
+
+
+def write_app_archive(app_spec: AppSpec, fileobj: BinaryIO, archive_format: str = "zip") -> int:
+    """
+    Write a generated app straight into an archive, without creating it on disk.
+    
+    Template files are streamed from the template in chunks and parameterized files
+    are rendered in memory, so memory use stays at one rendered file plus the
+    archive writer's buffers. fileobj may be a non-seekable stream (an HTTP response,
+    a pipe); zip entries then carry data descriptors and tar is written in stream mode.
     
-    if output_path.exists():
-        shutil.rmtree(output_path)  # Clean existing
+    Args:
+        app_spec: Specification of the app to generate
+        fileobj: Binary file object the archive is written to (left open)
+        archive_format: "zip", "tar" or "tar.gz" (default: "zip")
     
-    shutil.copytree(template_path, output_path)
+    Returns:
+        Number of files written to the archive
     
-    # 2. Parameterize key files
-    _parameterize_package_json(output_path, app_spec)
-    _parameterize_index_html(output_path, app_spec)
+    Raises:
+        ValueError: If the spec is invalid or the format is unknown
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format '{archive_format}'. Choose one of: {', '.join(ARCHIVE_FORMATS)}")
+    template_path = get_template_registry().validate_spec(app_spec).path
+    rendered = load_manifest(template_path).render(app_spec)
+    # Everything is placed under one top-level folder named after the app
+    prefix = app_spec.app_name
     
-    if app_spec.custom_content:
-        _parameterize_app_tsx(output_path, app_spec)
+    count = 0
+    if archive_format == "zip":
+        with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for relative, entry in _template_files(template_path):
+                info = zipfile.ZipInfo.from_file(entry.path, f"{prefix}/{relative}")
+                info.compress_type = zipfile.ZIP_DEFLATED
+                if relative in rendered:
+                    archive.writestr(info, rendered[relative].encode('utf-8'))
+                else:
+                    with open(entry.path, 'rb') as source, archive.open(info, 'w') as target:
+                        shutil.copyfileobj(source, target, 1024 * 1024)
+                count += 1
+    else:
+        mode = 'w|gz' if archive_format == "tar.gz" else 'w|'
+        with tarfile.open(fileobj=fileobj, mode=mode) as archive:
+            for relative, entry in _template_files(template_path):
+                info = archive.gettarinfo(entry.path, f"{prefix}/{relative}")
+                if relative in rendered:
+                    data = rendered[relative].encode('utf-8')
+                    info.size = len(data)
+                    archive.addfile(info, io.BytesIO(data))
+                elif info.isfile():
+                    with open(entry.path, 'rb') as source:
+                        archive.addfile(info, source)
+                else:
+                    archive.addfile(info)  # symlink
+                count += 1
+    return count
+
+
+def generate_app_archive(app_spec: AppSpec, archive_format: str = "zip") -> bytes:
+    """
+    Generate an app as an in-memory archive (e.g. for a download button).
+    
+    Args:
+        app_spec: Specification of the app to generate
+        archive_format: "zip", "tar" or "tar.gz" (default: "zip")
     
-    return f"✅ Generated app '{app_spec.app_name}' in {output_path}"
+    Returns:
+        The archive bytes
+    """
+    buffer = io.BytesIO()
+    write_app_archive(app_spec, buffer, archive_format)
+    return buffer.getvalue()
 
 
 # Helper functions (not tools)
-def _parameterize_package_json(output_path: Path, spec: AppSpec):
-    """Replace variables in package.json"""
-    package_json_path = output_path / "package.json"
-    
-    if not package_json_path.exists():
-        return
+def _template_files(template_path: Path):
+    """Every file of a template except its manifest, as (relative path, DirEntry)."""
+    for relative, entry in scan_files(template_path, ignore_dirs=False):
+        if relative != MANIFEST_NAME:
+            yield relative, entry
+
+
+def _write_rendered(source: Path, target: Path, content: str):
+    """Write a parameterized file as a new inode (never into a file shared with the template)."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(target, content, mode_from=source)
+
+
+def _update_incrementally(
+    template: TemplateInfo,
+    output_path: Path,
+    rendered: dict,
+    copy_mode: str
+) -> dict:
+    """
+    Bring an existing app up to date with the template and rendered files in place.
     
-    with open(package_json_path, 'r') as f:
-        content = f.read()
+    A file is rewritten only if its desired content changed and nobody edited it
+    since it was generated; edited files are kept as they are. Apps generated
+    before state was recorded are adopted: files that already match are recorded,
+    differing ones are treated as edited.
     
-    # Simple string replacement for package name
-    content = content.replace('"react-simple-spa"', f'"{spec.app_name}"')
-    content = content.replace('"0.0.0"', f'"{spec.version}"')
+    Returns:
+        Counts: {"written", "unchanged", "kept", "removed"}
+    """
+    state = GenerationState.load(output_path) or GenerationState(output_path, template.name)
+    state.template_name = template.name
     
-    # Add description if not exists or update existing
-    try:
-        # Try to parse as JSON to be more robust
-        data = json.loads(content)
-        data["description"] = spec.description
-        if spec.author:
-            data["author"] = spec.author
+    stats = {"written": 0, "unchanged": 0, "kept": 0, "removed": 0}
+    seen = set()
+    for relative, entry in _template_files(template.path):
+        seen.add(relative)
+        desired = hash_text(rendered[relative]) if relative in rendered else template.file_hash(relative)
+        target = output_path / relative
+        
+        if target.exists() and not state.is_untouched(relative):
+            if hash_file(target) == desired:
+                # Already right (adopted app, or a hardlink that followed the template)
+                state.record(relative, desired)
+                stats["unchanged"] += 1
+            else:
+                # Edited after generation (e.g. by an agent): not ours to overwrite
+                stats["kept"] += 1
+            continue
+        if not target.exists() and relative in state.files:
+            # Deleted after generation: respect that too
+            stats["kept"] += 1
+            continue
+        if target.exists() and state.recorded_hash(relative) == desired:
+            stats["unchanged"] += 1
+            continue
         
-        content = json.dumps(data, indent=2)
-    except json.JSONDecodeError:
-        # Fallback to string replacement if JSON parsing fails
-        if '"description":' not in content:
-            content = content.replace(
-                '"version":',
-                f'"description": "{spec.description}",\n  "version":'
-            )
+        if relative in rendered:
+            _write_rendered(Path(entry.path), target, rendered[relative])
         else:
-            # Replace existing description
-            import re
-            content = re.sub(
-                r'"description":\s*"[^"]*"',
-                f'"description": "{spec.description}"',
-                content
-            )
-    
-    with open(package_json_path, 'w') as f:
-        f.write(content)
-
-
-def _parameterize_index_html(output_path: Path, spec: AppSpec):
-    """Replace title in index.html"""
-    html_path = output_path / "index.html"
-    
-    if not html_path.exists():
-        return
-    
-    with open(html_path, 'r') as f:
-        content = f.read()
-    
-    # Replace common title patterns
-    title_patterns = [
-        '<title>Vite + React + TS</title>',
-        '<title>React App</title>',
-        '<title>Vite App</title>',
-        '<title>React</title>',
-    ]
-    
-    new_title = f'<title>{spec.display_name}</title>'
-    
-    for pattern in title_patterns:
-        if pattern in content:
-            content = content.replace(pattern, new_title)
-            break
-    else:
-        # If no pattern found, try to replace any title tag
-        import re
-        content = re.sub(
-            r'<title>[^<]*</title>',
-            new_title,
-            content
-        )
+            materialize_file(Path(entry.path), target, copy_mode)
+        state.record(relative, desired)
+        stats["written"] += 1
     
-    with open(html_path, 'w') as f:
-        f.write(content)
-
-
-def _parameterize_app_tsx(output_path: Path, spec: AppSpec):
-    """Replace content in App.tsx if custom_content provided"""
-    app_tsx_path = output_path / "src" / "App.tsx"
-    
-    if not app_tsx_path.exists():
-        return
-    
-    with open(app_tsx_path, 'r') as f:
-        content = f.read()
-    
-    # Look for the main content div and replace it
-    old_content_patterns = [
-        # Current template pattern
-        '''<div className="flex min-h-svh flex-col items-center justify-center">
-      <h1 className="text-4xl font-bold">Hello World</h1>
-      <Button>Click me</Button>
-    </div>''',
-        # Alternative patterns
-        '''<div className="flex min-h-screen flex-col items-center justify-center">
-      <h1 className="text-4xl font-bold">Hello World</h1>
-      <Button>Click me</Button>
-    </div>''',
-    ]
-    
-    new_content = f'''<div className="flex min-h-svh flex-col items-center justify-center">
-      {spec.custom_content}
-    </div>'''
-    
-    for old_pattern in old_content_patterns:
-        if old_pattern in content:
-            content = content.replace(old_pattern, new_content)
-            break
-    else:
-        # If no exact pattern found, try to find and replace the main div
-        import re
-        # Look for a div with min-h- class that contains content
-        pattern = r'<div className="[^"]*min-h-[^"]*"[^>]*>.*?</div>'
-        match = re.search(pattern, content, re.DOTALL)
-        if match:
-            content = content.replace(match.group(0), new_content)
+    # Files the template no longer has: remove them unless they were edited
+    for relative in sorted(set(state.files) - seen):
+        if state.is_untouched(relative):
+            (output_path / relative).unlink()
+            stats["removed"] += 1
+        state.forget(relative)
     
-    with open(app_tsx_path, 'w') as f:
-        f.write(content)
+    state.save()
+    return stats
 
 
 if __name__ == "__main__":
@@ -203,5 +305,5 @@ if __name__ == "__main__":
       <Button>Get Started</Button>'''
     )
     
-    result = generate_app_from_template(app_spec)
+    result = generate_app_from_spec(app_spec)
     print(result)
\ No newline at end of file
@@ -0,0 +1,221 @@
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from app_spec import AppSpec
+
+# Every template directory may ship one of these; it is never copied into generated apps
+MANIFEST_NAME = "template.json"
+
+RULE_KINDS = ("replace", "regex", "json_set")
+
+# {{ field }} placeholders in rule values, filled from the AppSpec
+_PLACEHOLDER_RE = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+_REGEX_FLAGS = {"DOTALL": re.DOTALL, "MULTILINE": re.MULTILINE, "IGNORECASE": re.IGNORECASE}
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One substitution from a template manifest, with its pattern compiled once at load time."""
+    kind: str
+    value: str
+    pattern: Optional[re.Pattern] = None  # replace / regex
+    key: tuple = ()  # json_set: path of keys into the JSON document
+    count: int = 0  # replace / regex: maximum replacements, 0 = all
+    when: Optional[str] = None  # AppSpec field that must be set for the rule to apply
+    optional: bool = False  # replace / regex: a missing match is not an error
+
+    def applies(self, values: dict) -> bool:
+        return self.when is None or bool(values.get(self.when))
+
+    def render_value(self, values: dict) -> str:
+        return _PLACEHOLDER_RE.sub(lambda m: str(values.get(m.group(1)) or ''), self.value)
+
+
+class TemplateManifest:
+    """Which files of a template contain which placeholders.
+
+    template.json looks like:
+
+        {
+          "description": "React + Vite + Tailwind single page app",
+          "files": {
+            "index.html": [
+              {"kind": "regex", "pattern": "<title>[^<]*</title>", "value": "<title>{{display_name}}</title>"}
+            ],
+            "package.json": [
+              {"kind": "json_set", "key": "name", "value": "{{app_name}}"},
+              {"kind": "json_set", "key": "author", "value": "{{author}}", "when": "author"}
+            ]
+          }
+        }
+
+    Rules of a file are applied in order on the text; all json_set rules of a file
+    are then applied in a single parse/serialize of the document.
+    """
+
+    def __init__(self, template_dir: Path, data: dict):
+        """
+        Args:
+            template_dir: Template directory the manifest belongs to
+            data: Parsed content of template.json
+
+        Raises:
+            ValueError: If a rule is malformed or refers to an unknown AppSpec field
+        """
+        self.template_dir = Path(template_dir)
+        self.name = data.get("name", self.template_dir.name)
+        self.description = data.get("description", "")
+        self.files: dict[str, list[Rule]] = {
+            relative: [_compile_rule(relative, index, raw) for index, raw in enumerate(rules)]
+            for relative, rules in data.get("files", {}).items()
+        }
+
+    @property
+    def parameterized_files(self) -> list[str]:
+        """POSIX paths (relative to the template) that are rendered instead of shared."""
+        return list(self.files)
+
+    def render(self, spec: AppSpec) -> dict[str, str]:
+        """
+        Render every parameterized file of the template for spec.
+
+        Each file is read once from the template; nothing is written.
+
+        Args:
+            spec: The app being generated
+
+        Returns:
+            Mapping relative path -> rendered content
+
+        Raises:
+            FileNotFoundError: If the manifest lists a file the template doesn't have
+            ValueError: If a required pattern doesn't match
+        """
+        values = spec.model_dump()
+        rendered = {}
+        for relative, rules in self.files.items():
+            source = self.template_dir / relative
+            if not source.is_file():
+                raise FileNotFoundError(f"{MANIFEST_NAME} of '{self.name}' lists missing file: {relative}")
+            with open(source, 'r', encoding='utf-8') as f:
+                content = f.read()
+            rendered[relative] = _apply_rules(content, rules, values, f"{self.name}/{relative}")
+        return rendered
+
+
+_manifests: dict[Path, tuple[Optional[int], TemplateManifest]] = {}
+_manifests_lock = threading.Lock()
+
+
+def load_manifest(template_dir: Path) -> TemplateManifest:
+    """
+    Return the parsed and compiled manifest of a template, reusing it until template.json changes.
+
+    A template without template.json gets an empty manifest (copied as-is).
+
+    Args:
+        template_dir: Template directory
+
+    Returns:
+        The TemplateManifest
+    """
+    template_dir = Path(template_dir).resolve()
+    manifest_path = template_dir / MANIFEST_NAME
+    try:
+        mtime = os.stat(manifest_path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    with _manifests_lock:
+        cached = _manifests.get(template_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+    data = {}
+    if mtime is not None:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    manifest = TemplateManifest(template_dir, data)
+    with _manifests_lock:
+        _manifests[template_dir] = (mtime, manifest)
+    return manifest
+
+
+def _compile_rule(relative: str, index: int, raw: dict) -> Rule:
+    where = f"{MANIFEST_NAME}: {relative} rule {index + 1}"
+    if not isinstance(raw, dict):
+        raise ValueError(f"{where}: a rule must be an object")
+    kind = raw.get("kind")
+    if kind not in RULE_KINDS:
+        raise ValueError(f"{where}: unknown kind '{kind}'. Choose one of: {', '.join(RULE_KINDS)}")
+    if "value" not in raw:
+        raise ValueError(f"{where}: missing 'value'")
+
+    value = raw["value"]
+    when = raw.get("when")
+    for field in _PLACEHOLDER_RE.findall(value) + ([when] if when else []):
+        if field not in AppSpec.model_fields:
+            raise ValueError(f"{where}: unknown AppSpec field '{field}'")
+
+    pattern = None
+    key = ()
+    if kind == "json_set":
+        if not raw.get("key"):
+            raise ValueError(f"{where}: json_set needs a 'key'")
+        key = tuple(raw["key"].split("."))
+    elif kind == "replace":
+        if not raw.get("old"):
+            raise ValueError(f"{where}: replace needs an 'old' string")
+        pattern = re.compile(re.escape(raw["old"]))
+    else:
+        if not raw.get("pattern"):
+            raise ValueError(f"{where}: regex needs a 'pattern'")
+        flags = 0
+        for name in raw.get("flags", []):
+            if name not in _REGEX_FLAGS:
+                raise ValueError(f"{where}: unknown regex flag '{name}'")
+            flags |= _REGEX_FLAGS[name]
+        try:
+            pattern = re.compile(raw["pattern"], flags)
+        except re.error as e:
+            raise ValueError(f"{where}: invalid pattern {raw['pattern']!r}: {e}")
+
+    return Rule(
+        kind=kind,
+        value=value,
+        pattern=pattern,
+        key=key,
+        count=raw.get("count", 0),
+        when=when,
+        optional=raw.get("optional", False),
+    )
+
+
+def _apply_rules(content: str, rules: list[Rule], values: dict, where: str) -> str:
+    json_rules = []
+    for rule in rules:
+        if not rule.applies(values):
+            continue
+        if rule.kind == "json_set":
+            json_rules.append(rule)
+            continue
+        replacement = rule.render_value(values)
+        # A callable keeps backslashes in the value from being read as group references
+        content, replaced = rule.pattern.subn(lambda m: replacement, content, count=rule.count)
+        if not replaced and not rule.optional:
+            raise ValueError(f"{where}: pattern {rule.pattern.pattern!r} not found")
+
+    if json_rules:
+        data = json.loads(content)
+        for rule in json_rules:
+            node = data
+            for part in rule.key[:-1]:
+                node = node.setdefault(part, {})
+            node[rule.key[-1]] = rule.render_value(values)
+        content = json.dumps(data, indent=2, ensure_ascii=False) + "\n"
+    return content
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Index of the templates under templates/.
+
+The registry scans templates/ once, records each template's manifest metadata and
+per-file content hashes in templates/.template-index.json, and afterwards answers
+lookups from a dict. Rescans reuse the stored hash of every file whose
+(mtime_ns, size) is unchanged, so only new or modified files are read.
+
+Specs can be checked before any generation or agent work starts:
+
+    python template_registry.py list
+    python template_registry.py validate generated_app/*/app_spec.json
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from pydantic import ValidationError
+
+from app_spec import AppSpec
+from atomic_io import atomic_write_text
+from code_search import scan_files
+from generation_state import hash_file
+from template_manifest import MANIFEST_NAME, load_manifest
+
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
+INDEX_NAME = ".template-index.json"
+# Bump when the index layout changes; older indexes are rebuilt from scratch
+INDEX_VERSION = 1
+
+
+@dataclass
+class TemplateInfo:
+    """Metadata and content hashes of one template."""
+    name: str
+    path: Path
+    description: str = ""
+    parameterized_files: list = field(default_factory=list)
+    # relative path -> {"sha256", "size", "mtime_ns"}
+    files: dict = field(default_factory=dict)
+
+    @property
+    def content_hash(self) -> str:
+        """One sha256 over all file paths and hashes; changes whenever any template file does."""
+        digest = hashlib.sha256()
+        for relative in sorted(self.files):
+            digest.update(f"{relative}\0{self.files[relative]['sha256']}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def file_hash(self, relative: str) -> str:
+        """
+        sha256 of a template file, from the index unless the file changed since it was scanned.
+
+        Args:
+            relative: Path of the file inside the template
+
+        Returns:
+            Hex digest
+        """
+        path = self.path / relative
+        entry = self.files.get(relative)
+        if entry is not None:
+            st = os.stat(path)
+            if (st.st_mtime_ns, st.st_size) == (entry["mtime_ns"], entry["size"]):
+                return entry["sha256"]
+        return hash_file(path)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self.files.values())
+
+    def to_json(self) -> dict:
+        return {
+            "description": self.description,
+            "parameterized_files": self.parameterized_files,
+            "content_hash": self.content_hash,
+            "files": self.files,
+        }
+
+
+class TemplateRegistry:
+    """All templates of a templates directory, keyed by name."""
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR):
+        """
+        Args:
+            templates_dir: Directory holding one sub-directory per template
+        """
+        self.templates_dir = Path(templates_dir).resolve()
+        self.index_path = self.templates_dir / INDEX_NAME
+        self._templates: dict[str, TemplateInfo] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def refresh(self) -> int:
+        """
+        Rescan the templates directory and rewrite the index if anything changed.
+
+        Returns:
+            Number of files that had to be (re)hashed
+        """
+        with self._lock:
+            previous = self._read_index()
+            templates = {}
+            rehashed = 0
+            if self.templates_dir.is_dir():
+                for entry in sorted(os.scandir(self.templates_dir), key=lambda e: e.name):
+                    if not entry.is_dir() or entry.name.startswith('.'):
+                        continue
+                    info, count = self._scan_template(Path(entry.path), previous.get(entry.name, {}))
+                    templates[info.name] = info
+                    rehashed += count
+
+            changed = rehashed or set(templates) != set(previous) or any(
+                set(info.files) != set(previous[name].get("files", {}))
+                or info.description != previous[name].get("description")
+                or info.parameterized_files != previous[name].get("parameterized_files")
+                for name, info in templates.items()
+            )
+            self._templates = templates
+            self._loaded = True
+            if changed:
+                self._write_index()
+            return rehashed
+
+    def names(self) -> list[str]:
+        """Sorted names of all known templates."""
+        self._ensure_loaded()
+        return sorted(self._templates)
+
+    def get(self, name: str) -> TemplateInfo:
+        """
+        Look up a template by name.
+
+        Raises:
+            ValueError: If there is no such template (with the closest known names)
+        """
+        self._ensure_loaded()
+        info = self._templates.get(name)
+        if info is None and (self.templates_dir / name).is_dir() and not name.startswith('.'):
+            # Added since the last scan
+            self.refresh()
+            info = self._templates.get(name)
+        if info is None:
+            raise ValueError(_unknown_template_message(name, list(self._templates)))
+        return info
+
+    def validate_spec(self, spec: AppSpec) -> TemplateInfo:
+        """
+        Check that spec can be generated, without touching the output directory.
+
+        Verifies the app name is a single path component, the template exists, its
+        manifest compiles and the manifest's files are present.
+
+        Args:
+            spec: Spec to check
+
+        Returns:
+            The spec's TemplateInfo
+
+        Raises:
+            ValueError: Describing the first problem found
+        """
+        name = spec.app_name
+        if not name or name in ('.', '..') or '/' in name or '\\' in name:
+            raise ValueError(f"Invalid app_name '{name}': it must be a single directory name")
+        info = self.get(spec.template_name)
+        manifest = load_manifest(info.path)
+        missing = [relative for relative in manifest.parameterized_files if relative not in info.files]
+        if missing:
+            raise ValueError(f"Template '{info.name}' {MANIFEST_NAME} lists missing files: {', '.join(missing)}")
+        return info
+
+    # Internal helpers
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.refresh()
+
+    def _scan_template(self, path: Path, previous: dict) -> tuple[TemplateInfo, int]:
+        old_files = previous.get("files", {})
+        files = {}
+        rehashed = 0
+        for relative, entry in scan_files(path, ignore_dirs=False):
+            st = entry.stat()
+            old = old_files.get(relative)
+            if old is not None and (old["mtime_ns"], old["size"]) == (st.st_mtime_ns, st.st_size):
+                files[relative] = old
+                continue
+            files[relative] = {"sha256": hash_file(Path(entry.path)), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            rehashed += 1
+
+        try:
+            manifest = load_manifest(path)
+            description, parameterized = manifest.description, manifest.parameterized_files
+        except (ValueError, json.JSONDecodeError) as e:
+            # Still registered, so validate_spec reports the broken manifest instead of "unknown template"
+            description, parameterized = f"(invalid {MANIFEST_NAME}: {e})", []
+        info = TemplateInfo(path.name, path, description, parameterized, files)
+        return info, rehashed
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("templates", {})
+
+    def _write_index(self):
+        data = {
+            "version": INDEX_VERSION,
+            "templates": {name: info.to_json() for name, info in sorted(self._templates.items())},
+        }
+        try:
+            atomic_write_text(self.index_path, json.dumps(data, indent=2))
+        except OSError:
+            # A read-only checkout still works, it just rescans every process
+            pass
+
+
+def _unknown_template_message(name: str, known: list) -> str:
+    message = f"Unknown template '{name}'."
+    close = difflib.get_close_matches(name, known, n=3)
+    if close:
+        message += f" Did you mean: {', '.join(close)}?"
+    return message + f" Available templates: {', '.join(sorted(known)) or '(none)'}"
+
+
+_registry: Optional[TemplateRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Return the process-wide registry for the repository's templates/ directory."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TemplateRegistry()
+        return _registry
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect templates and validate app specs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Rescan templates/ and list them")
+    validate_parser = subparsers.add_parser("validate", help="Validate app_spec.json files against the registry")
+    validate_parser.add_argument("specs", nargs="+", help="AppSpec JSON files")
+    cli_args = parser.parse_args()
+
+    registry = get_template_registry()
+    if cli_args.command == "list":
+        count = registry.refresh()
+        for template_name in registry.names():
+            template = registry.get(template_name)
+            print(f"{template_name}: {len(template.files)} files, {template.total_bytes / 1024:.1f} KB, "
+                  f"hash {template.content_hash[:12]} - {template.description}")
+        print(f"({count} files hashed)")
+    else:
+        failures = 0
+        for spec_path in cli_args.specs:
+            try:
+                with open(spec_path, 'r', encoding='utf-8') as f:
+                    registry.validate_spec(AppSpec.model_validate(json.load(f)))
+                print(f"✅ {spec_path}")
+            except (ValueError, ValidationError, OSError) as e:
+                failures += 1
+                print(f"❌ {spec_path}: {e}")
+        sys.exit(1 if failures else 0)
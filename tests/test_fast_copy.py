@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+from fast_copy import materialize_file, materialize_tree
+
+
+@pytest.fixture
+def source(tmp_path):
+    source = tmp_path / "template"
+    (source / "src").mkdir(parents=True)
+    (source / "package.json").write_text('{"name": "template"}')
+    (source / "src" / "main.ts").write_text("console.log('hi')\n")
+    (source / "README.md").write_text("render me")
+    os.symlink("src/main.ts", source / "entry.ts")
+    return source
+
+
+@pytest.mark.parametrize("mode", ["auto", "copy"])
+def test_default_modes_never_share_inodes_with_the_source(tmp_path, source, mode):
+    destination = tmp_path / "app"
+    stats = materialize_tree(source, destination, mode=mode, skip_files=["README.md"])
+
+    assert stats["hardlinked"] == 0
+    assert stats["symlinks"] == 1
+    assert not (destination / "README.md").exists()
+    assert os.readlink(destination / "entry.ts") == "src/main.ts"
+    # An in-place append (editor, formatter, >>) must not reach the template
+    with open(destination / "src" / "main.ts", "a") as f:
+        f.write("// edited\n")
+    assert (source / "src" / "main.ts").read_text() == "console.log('hi')\n"
+    assert os.stat(source / "package.json").st_nlink == 1
+
+
+def test_hardlink_mode_is_explicit_opt_in(tmp_path, source):
+    stats = materialize_tree(source, tmp_path / "app", mode="hardlink", copy_files=["package.json"])
+    assert stats["hardlinked"] == 2
+    assert os.stat(source / "src" / "main.ts").st_nlink == 2
+    assert os.stat(source / "package.json").st_nlink == 1
+
+
+def test_materialize_file_replaces_existing_target(tmp_path, source):
+    target = tmp_path / "out" / "package.json"
+    target.parent.mkdir()
+    target.write_text("old")
+    materialize_file(source / "package.json", target)
+    assert target.read_text() == '{"name": "template"}'
+
+
+def test_unknown_mode_is_rejected(tmp_path, source):
+    with pytest.raises(ValueError):
+        materialize_tree(source, tmp_path / "app", mode="symlink")
@@ -0,0 +1,80 @@
+import os
+import time
+
+import pytest
+
+from file_transaction import STAGING_PREFIX, WriteTransaction, sweep_stale_staging_dirs
+from workspace import Workspace
+
+
+def test_commit_applies_every_staged_file(tmp_path):
+    (tmp_path / "a.txt").write_text("old")
+    with WriteTransaction(tmp_path) as transaction:
+        transaction.stage(tmp_path / "a.txt", "new")
+        transaction.stage(tmp_path / "ui" / "b.txt", "created")
+        transaction.stage(tmp_path / "a.txt", "!", mode='a')
+        # Nothing is visible before the commit
+        assert (tmp_path / "a.txt").read_text() == "old"
+        assert not (tmp_path / "ui").exists()
+        assert transaction.staged_text(tmp_path / "a.txt") == "new!"
+
+    assert (tmp_path / "a.txt").read_text() == "new!"
+    assert (tmp_path / "ui" / "b.txt").read_text() == "created"
+    assert not list(tmp_path.glob(f"{STAGING_PREFIX}*"))
+
+
+def test_exception_rolls_back_every_staged_file(tmp_path):
+    (tmp_path / "a.txt").write_text("old")
+    with pytest.raises(RuntimeError):
+        with WriteTransaction(tmp_path) as transaction:
+            transaction.stage(tmp_path / "a.txt", "new")
+            transaction.stage(tmp_path / "b.txt", "created")
+            raise RuntimeError("agent failed")
+
+    assert (tmp_path / "a.txt").read_text() == "old"
+    assert not (tmp_path / "b.txt").exists()
+    assert not list(tmp_path.glob(f"{STAGING_PREFIX}*"))
+
+
+def test_flush_commits_so_far_and_rollback_discards_only_later_writes(tmp_path):
+    transaction = WriteTransaction(tmp_path)
+    transaction.stage(tmp_path / "a.txt", "first")
+    transaction.flush()
+    assert (tmp_path / "a.txt").read_text() == "first"
+
+    transaction.stage(tmp_path / "a.txt", "second")
+    transaction.stage(tmp_path / "b.txt", "second")
+    transaction.rollback()
+    assert (tmp_path / "a.txt").read_text() == "first"
+    assert not (tmp_path / "b.txt").exists()
+    with pytest.raises(RuntimeError):
+        transaction.flush()
+
+
+def test_stage_outside_root_is_rejected(tmp_path):
+    with WriteTransaction(tmp_path / "project") as transaction:
+        with pytest.raises(ValueError):
+            transaction.stage(tmp_path / "elsewhere.txt", "x")
+
+
+def test_workspace_reads_and_lists_staged_files(tmp_path):
+    workspace = Workspace(str(tmp_path))
+    with workspace.write_transaction():
+        workspace.write_file("notes.md", "draft")
+        assert "draft" in workspace.read_file("notes.md")
+        assert "notes.md (5 bytes)" in workspace.list_files(".")
+        assert not (tmp_path / "notes.md").exists()
+    assert (tmp_path / "notes.md").read_text() == "draft"
+
+
+def test_sweep_removes_only_stale_staging_dirs(tmp_path):
+    stale = tmp_path / f"{STAGING_PREFIX}stale"
+    fresh = tmp_path / f"{STAGING_PREFIX}fresh"
+    stale.mkdir()
+    fresh.mkdir()
+    old = time.time() - 7 * 60 * 60
+    os.utime(stale, (old, old))
+
+    assert sweep_stale_staging_dirs(tmp_path, force=True) == 1
+    assert not stale.exists()
+    assert fresh.exists()
@@ -0,0 +1,94 @@
+from pathlib import Path
+
+from pipeline import Pipeline, Stage
+from retry_policy import RetryPolicy
+
+
+class FakeAgent:
+    """Stands in for a smolagents agent: run() calls the stage's step function."""
+
+    def __init__(self, step, calls):
+        self.step = step
+        self.calls = calls
+
+    def run(self, task):
+        self.calls.append(task)
+        self.step()
+
+
+def make_stage(name, step, calls, **kwargs):
+    return Stage(
+        name=name,
+        label=name,
+        prompt=name,
+        agent_type=lambda tools, model, **options: FakeAgent(step, calls),
+        model=lambda: None,
+        tools=[],
+        retry=RetryPolicy(max_attempts=1),
+        **kwargs,
+    )
+
+
+def build_pipeline(project: Path, calls: list, fix_fails: bool) -> Pipeline:
+    def prd():
+        (project / "PRD.md").write_text("# PRD")
+
+    def ui():
+        (project / "ui").mkdir(exist_ok=True)
+        (project / "ui" / "index.html").write_text("<html></html>")
+
+    def auto_fix():
+        # Edits an earlier stage's output, then fails
+        (project / "ui" / "index.html").write_text("<html>fixed</html>")
+        if fix_fails:
+            raise RuntimeError("model refused")
+        (project / "auto_fix_report.md").write_text("done")
+
+    return Pipeline([
+        make_stage("prd", prd, calls, outputs=("PRD.md",)),
+        make_stage("ui", ui, calls, depends_on=("prd",), inputs=("PRD.md",), outputs=("ui/index.html",)),
+        make_stage("auto_fix", auto_fix, calls, depends_on=("ui",), inputs=("ui",),
+                   outputs=("auto_fix_report.md",)),
+    ])
+
+
+def run(project: Path, fix_fails: bool):
+    calls = []
+    results = build_pipeline(project, calls, fix_fails).run(
+        lambda name: name, project_dir=lambda: project, run_inputs={"requirements": "abc"}
+    )
+    return {name: result.status for name, result in results.items()}, calls
+
+
+def test_rerun_skips_completed_stages(tmp_path):
+    run(tmp_path, fix_fails=False)
+    statuses, calls = run(tmp_path, fix_fails=False)
+    assert statuses == {"prd": "up_to_date", "ui": "up_to_date", "auto_fix": "up_to_date"}
+    assert calls == []
+
+
+def test_rerun_resumes_at_failed_stage_that_edited_earlier_outputs(tmp_path):
+    statuses, _ = run(tmp_path, fix_fails=True)
+    assert statuses["auto_fix"] == "failed"
+
+    statuses, calls = run(tmp_path, fix_fails=False)
+    assert statuses == {"prd": "up_to_date", "ui": "up_to_date", "auto_fix": "completed"}
+    assert calls == ["auto_fix"]
+
+
+def test_external_edit_reruns_stage_and_everything_after_it(tmp_path):
+    run(tmp_path, fix_fails=False)
+    (tmp_path / "ui" / "index.html").write_text("<html>edited by hand</html>")
+
+    statuses, calls = run(tmp_path, fix_fails=False)
+    assert statuses["prd"] == "up_to_date"
+    assert calls == ["ui", "auto_fix"]
+
+
+def test_other_run_inputs_start_over(tmp_path):
+    run(tmp_path, fix_fails=False)
+    calls = []
+    build_pipeline(tmp_path, calls, fix_fails=False).run(
+        lambda name: name, project_dir=lambda: tmp_path, run_inputs={"requirements": "other"}
+    )
+    assert calls == ["prd", "ui", "auto_fix"]
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from smolagents import tool
+
+from am_tools import write_file
+from pipeline import Pipeline, Stage
+from retry_policy import RetryPolicy
+from workspace import Workspace
+
+
+class ScriptedAgent:
+    """Stands in for a smolagents agent: run() calls script with the agent's tools by name."""
+
+    def __init__(self, tools, script):
+        self.tools = {t.name: t for t in tools}
+        self.script = script
+
+    def run(self, task):
+        self.script(self.tools)
+
+
+def run_stage(project: Path, script, direct_io_tools=()):
+    @tool
+    def read_index() -> str:
+        """
+        Reads ui/index.html straight from disk, like the am_tools helpers do.
+
+        Returns:
+            The file content, or an empty string if it does not exist
+        """
+        path = project / "ui" / "index.html"
+        return path.read_text() if path.exists() else ""
+
+    stage = Stage(
+        name="auto_fix",
+        label="Auto Fix",
+        prompt="auto_fix",
+        agent_type=lambda tools, model, **options: ScriptedAgent(tools, script),
+        model=lambda: None,
+        tools=[write_file, read_index],
+        retry=RetryPolicy(max_attempts=1),
+        transactional=True,
+        direct_io_tools=direct_io_tools,
+    )
+    return Pipeline([stage]).run(lambda name: name, workspace=lambda: Workspace(str(project)))["auto_fix"]
+
+
+def test_failed_transactional_stage_leaves_project_untouched(tmp_path):
+    def script(tools):
+        tools["write_file"]("ui/index.html", "<html>half</html>")
+        tools["write_file"]("ui/app.js", "half")
+        raise RuntimeError("model refused")
+
+    assert run_stage(tmp_path, script).status == "failed"
+    assert not (tmp_path / "ui").exists()
+
+
+def test_direct_io_tool_sees_earlier_writes(tmp_path):
+    seen = []
+
+    def script(tools):
+        tools["write_file"]("ui/index.html", "<html>fixed</html>")
+        seen.append(tools["read_index"]())
+        tools["write_file"]("ui/app.js", "half")
+        raise RuntimeError("model refused")
+
+    assert run_stage(tmp_path, script, direct_io_tools=("read_index",)).status == "failed"
+    assert seen == ["<html>fixed</html>"]
+    # Writes before the direct tool call were committed, later ones rolled back
+    assert (tmp_path / "ui" / "index.html").read_text() == "<html>fixed</html>"
+    assert not (tmp_path / "ui" / "app.js").exists()
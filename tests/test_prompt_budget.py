@@ -0,0 +1,58 @@
+import pytest
+
+import prompts.prompt_manager as prompt_manager
+
+DESCRIPTION = "Track daily habits with streaks and reminders"
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    # Budgets below are computed with the chars/4 estimate, whether tiktoken is installed or not
+    monkeypatch.setattr(prompt_manager, "tiktoken", None)
+    return prompt_manager.PromptManager()
+
+
+def fixed_tokens(manager, description=" …", requirements=()):
+    return prompt_manager.count_tokens(manager.render_main_prompt("HabitApp", description, list(requirements)))
+
+
+def test_prompt_within_budget_is_not_trimmed(manager):
+    full = fixed_tokens(manager, DESCRIPTION)
+    rendered = manager.render_main_prompt_budgeted("HabitApp", DESCRIPTION, max_tokens=full)
+    assert rendered.fits
+    assert rendered.trimmed == []
+    assert DESCRIPTION in rendered.text
+
+
+def test_requirements_are_dropped_from_the_end_first(manager):
+    requirements = ["Dark mode", "Export to CSV " * 50]
+    budget = fixed_tokens(manager, DESCRIPTION, ["Dark mode", "(1 more requirements omitted to fit the prompt budget)"])
+    rendered = manager.render_main_prompt_budgeted("HabitApp", DESCRIPTION, budget, requirements)
+    assert rendered.fits
+    assert rendered.trimmed == ["1 of 2 additional requirements omitted"]
+    assert "Dark mode" in rendered.text and DESCRIPTION in rendered.text
+
+
+def test_description_keeps_its_first_word_when_no_word_fits(manager):
+    # Room for the fixed text and the ellipsis, but not for a single word
+    budget = fixed_tokens(manager)
+    assert fixed_tokens(manager, "Track …") > budget
+
+    rendered = manager.render_main_prompt_budgeted("HabitApp", DESCRIPTION, max_tokens=budget)
+    assert "Track …" in rendered.text
+    assert rendered.trimmed == ["description shortened from 7 to 1 words"]
+    assert not rendered.fits
+
+
+def test_description_is_shortened_at_a_word_boundary(manager):
+    budget = fixed_tokens(manager, "Track daily habits …")
+    rendered = manager.render_main_prompt_budgeted("HabitApp", DESCRIPTION, max_tokens=budget)
+    assert rendered.fits
+    assert "Track daily habits …" in rendered.text
+
+
+def test_description_is_kept_whole_when_the_fixed_text_is_over_budget(manager):
+    rendered = manager.render_main_prompt_budgeted("HabitApp", DESCRIPTION, max_tokens=fixed_tokens(manager) - 1)
+    assert DESCRIPTION in rendered.text
+    assert rendered.trimmed == []
+    assert not rendered.fits
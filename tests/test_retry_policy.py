@@ -0,0 +1,83 @@
+import random
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from retry_policy import RetryPolicy, is_retryable_error, retry_after_seconds
+
+
+class ProviderError(Exception):
+    def __init__(self, message="", status_code=None, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}, "status_code": status_code})()
+
+
+@pytest.mark.parametrize("message, seconds", [
+    ("Rate limit reached. Please retry in 12.5s.", 12.5),
+    ('{"retryDelay": "30s"}', 30.0),
+    ("retry after 20 seconds", 20.0),
+    ("retry after 2 minutes", 120.0),
+    ("retry after 250ms", 0.25),
+    ("Retry-After: 7", 7.0),
+    ("retry in 3 attempts, or retry after 4s", 4.0),
+    ("service unavailable", None),
+])
+def test_retry_hint_in_message(message, seconds):
+    assert retry_after_seconds(Exception(message)) == seconds
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(ProviderError(headers={"retry-after": "3"})) == 3.0
+    assert retry_after_seconds(ProviderError(headers={"retry-after-ms": "1500", "retry-after": "9"})) == 1.5
+    date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= retry_after_seconds(ProviderError(headers={"retry-after": date})) <= 60
+
+
+def test_hint_found_on_wrapped_error():
+    try:
+        try:
+            raise ProviderError("quota exceeded", 429, {"retry-after": "5"})
+        except ProviderError as e:
+            raise RuntimeError("Error in generating model output") from e
+    except RuntimeError as wrapped:
+        assert is_retryable_error(wrapped)
+        assert retry_after_seconds(wrapped) == 5.0
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (ProviderError(status_code=503), True),
+    (ProviderError(status_code=400), False),
+    (Exception("Connection reset by peer"), True),
+    (ValueError("invalid tool arguments"), False),
+])
+def test_retryable_errors(error, retryable):
+    assert is_retryable_error(error) is retryable
+
+
+def test_backoff_is_full_jitter_below_the_exponential_ceiling(monkeypatch):
+    policy = RetryPolicy(base_delay=2, multiplier=2, max_delay=10)
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    assert [policy.backoff(attempt) for attempt in (1, 2, 3, 4)] == [2, 4, 8, 10]
+    monkeypatch.setattr(random, "uniform", lambda low, high: low)
+    assert policy.backoff(3) == 0
+
+
+def test_next_delay(monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    policy = RetryPolicy(max_attempts=3, base_delay=2, max_total_delay=30)
+    transient = ProviderError(status_code=503)
+
+    assert policy.next_delay(1, transient, slept=0) == 2
+    # The last attempt and permanent errors are never retried
+    assert policy.next_delay(3, transient, slept=0) is None
+    assert policy.next_delay(1, ValueError("bad request"), slept=0) is None
+    # A provider hint is a minimum wait
+    assert policy.next_delay(1, ProviderError("retry after 20s", 429), slept=0) == 20
+    # The budget covers the waits only, however long the attempts took
+    assert policy.next_delay(2, transient, slept=25) == 4
+    assert policy.next_delay(2, transient, slept=27) is None
+    assert "retry wait budget" in policy.describe_stop(2, transient, slept=27)
+    assert policy.describe_stop(3, transient, slept=0) == "all retries exhausted"
+    assert policy.describe_stop(1, ValueError("bad request"), slept=0) == "non-retryable error"
@@ -0,0 +1,80 @@
+import shutil
+from pathlib import Path
+
+from pipeline import Pipeline, Stage
+from retry_policy import RetryPolicy
+from stage_cache import StageCache
+
+
+class FakeAgent:
+    def __init__(self, step):
+        self.step = step
+
+    def run(self, task):
+        self.step()
+
+
+def build_pipeline(project: Path, prd_text: str, calls: list) -> Pipeline:
+    def stage(name, step, **kwargs):
+        def run():
+            calls.append(name)
+            step()
+        return Stage(name=name, label=name, prompt=name, agent_type=lambda tools, model, **options: FakeAgent(run),
+                     model=lambda: None, tools=[], retry=RetryPolicy(max_attempts=1), **kwargs)
+
+    def prd():
+        # Worded differently on every run, same canonical spec
+        (project / "PRD.md").write_text(prd_text)
+        (project / "app_spec.json").write_text('{"app_name": "demo"}')
+
+    def ui():
+        (project / "ui").mkdir(exist_ok=True)
+        # A UI agent builds a different UI every time it runs
+        (project / "ui" / "index.html").write_text(f"<html>{project.name}</html>")
+        (project / "ui" / "UI_STRUCTURE.json").write_text(f'{{"built_in": "{project.name}"}}')
+
+    def implementation():
+        (project / "ui" / "app.js").write_text(f"// built on {(project / 'ui' / 'UI_STRUCTURE.json').read_text()}")
+
+    return Pipeline([
+        stage("prd", prd, outputs=("PRD.md", "app_spec.json")),
+        stage("ui", ui, depends_on=("prd",), inputs=("PRD.md", "app_spec.json"),
+              outputs=("ui/index.html", "ui/UI_STRUCTURE.json"), cacheable=True),
+        stage("implementation", implementation, depends_on=("ui",),
+              inputs=("PRD.md", "app_spec.json", "ui/UI_STRUCTURE.json"), cacheable=True),
+    ])
+
+
+def run(project: Path, cache: StageCache, prd_text: str):
+    project.mkdir(exist_ok=True)
+    calls = []
+    results = build_pipeline(project, prd_text, calls).run(
+        lambda name: name, project_dir=lambda: project, stage_cache=cache, cache_key=lambda: "same-spec"
+    )
+    return {name: result.status for name, result in results.items()}, calls
+
+
+def test_other_project_with_same_spec_reuses_ui_and_implementation(tmp_path):
+    cache = StageCache(tmp_path / "cache")
+    run(tmp_path / "first", cache, "# A habit tracker")
+
+    statuses, calls = run(tmp_path / "second", cache, "# Habit tracking app")
+    assert statuses == {"prd": "completed", "ui": "restored", "implementation": "restored"}
+    assert calls == ["prd"]
+    second, first = tmp_path / "second", tmp_path / "first"
+    # This run's PRD is kept; the restored files are the ones built together
+    assert (second / "PRD.md").read_text() == "# Habit tracking app"
+    for relative in ("ui/index.html", "ui/UI_STRUCTURE.json", "ui/app.js"):
+        assert (second / relative).read_text() == (first / relative).read_text()
+
+
+def test_implementation_is_not_restored_onto_another_ui(tmp_path):
+    cache = StageCache(tmp_path / "cache")
+    run(tmp_path / "first", cache, "# A habit tracker")
+    # Lose the UI snapshot only, so the next run builds a new UI for the same spec
+    for snapshot in cache.cache_dir.glob("*/*/ui"):
+        shutil.rmtree(snapshot)
+
+    statuses, calls = run(tmp_path / "second", cache, "# Habit tracking app")
+    assert calls == ["prd", "ui", "implementation"]
+    assert "second" in (tmp_path / "second" / "ui" / "app.js").read_text()
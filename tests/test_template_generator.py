@@ -0,0 +1,52 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import template_generator
+import template_registry
+from generation_state import STATE_DIR, STATE_FILE, hash_file
+from template_generator import generate_app_from_template
+from template_registry import get_template_registry
+
+
+@pytest.fixture
+def no_template_hashing(monkeypatch):
+    """Fail if a template file is hashed again after the registry index was loaded."""
+    template_path = get_template_registry().get("react-simple-spa").path
+
+    def guarded_hash_file(path):
+        assert not Path(path).is_relative_to(template_path), f"template file re-hashed: {path}"
+        return hash_file(path)
+
+    monkeypatch.setattr(template_registry, "hash_file", guarded_hash_file)
+    monkeypatch.setattr(template_generator, "hash_file", guarded_hash_file)
+
+
+def generate(output_dir: Path, display_name: str, incremental: bool = False) -> str:
+    return generate_app_from_template("demo", display_name, "A demo app", output_dir=str(output_dir),
+                                      copy_mode="copy", incremental=incremental)
+
+
+def recorded_hashes(app_dir: Path) -> dict:
+    with open(app_dir / STATE_DIR / STATE_FILE, encoding='utf-8') as f:
+        return {relative: entry["sha256"] for relative, entry in json.load(f)["files"].items()}
+
+
+def test_generation_state_uses_index_hashes(tmp_path, no_template_hashing):
+    assert generate(tmp_path, "Demo").startswith("✅")
+    app_dir = tmp_path / "demo"
+    hashes = recorded_hashes(app_dir)
+    assert hashes
+    assert all(hash_file(app_dir / relative) == digest for relative, digest in hashes.items())
+
+
+def test_incremental_update_keeps_edited_files(tmp_path, no_template_hashing):
+    generate(tmp_path, "Demo")
+    app_dir = tmp_path / "demo"
+    edited = app_dir / "vite.config.ts"
+    edited.write_text(edited.read_text() + "\n// edited by hand\n")
+
+    message = generate(tmp_path, "Demo Renamed", incremental=True)
+    assert "1 edited files kept" in message
+    assert edited.read_text().endswith("// edited by hand\n")
@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+
+from app_spec import AppSpec
+from template_manifest import MANIFEST_NAME, TemplateManifest, load_manifest
+
+SPEC = AppSpec(app_name="habit-app", display_name="Habit App", description="Track habits")
+
+
+def manifest(tmp_path, files: dict, rules: dict) -> TemplateManifest:
+    for relative, content in files.items():
+        (tmp_path / relative).write_text(content)
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps({"files": rules}))
+    return load_manifest(tmp_path)
+
+
+def test_rules_render_each_file(tmp_path):
+    rendered = manifest(
+        tmp_path,
+        {
+            "index.html": "<title>Template</title><h1>Template</h1>",
+            "package.json": '{"name": "template", "version": "0.0.0"}',
+        },
+        {
+            "index.html": [
+                {"kind": "regex", "pattern": "<title>[^<]*</title>", "value": "<title>{{display_name}}</title>"},
+                {"kind": "replace", "old": "<h1>Template</h1>", "value": "<h1>{{ description }}</h1>"},
+            ],
+            "package.json": [
+                {"kind": "json_set", "key": "name", "value": "{{app_name}}"},
+                {"kind": "json_set", "key": "meta.author", "value": "{{author}}", "when": "author"},
+            ],
+        },
+    ).render(SPEC)
+
+    assert rendered["index.html"] == "<title>Habit App</title><h1>Track habits</h1>"
+    assert json.loads(rendered["package.json"]) == {"name": "habit-app", "version": "0.0.0"}
+
+    with_author = load_manifest(tmp_path).render(SPEC.model_copy(update={"author": "Ada"}))
+    assert json.loads(with_author["package.json"])["meta"] == {"author": "Ada"}
+
+
+def test_replacement_value_is_literal(tmp_path):
+    spec = SPEC.model_copy(update={"display_name": r"C:\new \1 App"})
+    rendered = manifest(
+        tmp_path,
+        {"index.html": "<title>x</title>"},
+        {"index.html": [{"kind": "regex", "pattern": "<title>(.*)</title>", "value": "<title>{{display_name}}</title>"}]},
+    ).render(spec)
+    assert rendered["index.html"] == r"<title>C:\new \1 App</title>"
+
+
+def test_missing_match_fails_unless_optional(tmp_path):
+    rule = {"kind": "replace", "old": "absent", "value": "x"}
+    with pytest.raises(ValueError, match="not found"):
+        manifest(tmp_path, {"a.txt": "text"}, {"a.txt": [rule]}).render(SPEC)
+    rendered = TemplateManifest(tmp_path, {"files": {"a.txt": [{**rule, "optional": True}]}}).render(SPEC)
+    assert rendered["a.txt"] == "text"
+
+
+def test_missing_file_is_reported(tmp_path):
+    rules = {"missing.txt": [{"kind": "replace", "old": "a", "value": "b"}]}
+    with pytest.raises(FileNotFoundError, match="missing.txt"):
+        TemplateManifest(tmp_path, {"files": rules}).render(SPEC)
+
+
+@pytest.mark.parametrize("rule, message", [
+    ({"kind": "replace", "value": "x"}, "replace needs an 'old' string"),
+    ({"kind": "regex", "value": "x"}, "regex needs a 'pattern'"),
+    ({"kind": "regex", "pattern": "(", "value": "x"}, "invalid pattern"),
+    ({"kind": "regex", "pattern": "a", "value": "x", "flags": ["VERBOSE"]}, "unknown regex flag 'VERBOSE'"),
+    ({"kind": "json_set", "value": "x"}, "json_set needs a 'key'"),
+    ({"kind": "upper", "value": "x"}, "unknown kind 'upper'"),
+    ({"kind": "replace", "old": "a"}, "missing 'value'"),
+    ({"kind": "replace", "old": "a", "value": "{{colour}}"}, "unknown AppSpec field 'colour'"),
+    ("replace a with b", "a rule must be an object"),
+])
+def test_malformed_rules_raise_value_error_with_location(tmp_path, rule, message):
+    rules = {"a.txt": [{"kind": "replace", "old": "a", "value": "b"}, rule]}
+    with pytest.raises(ValueError, match=f"{MANIFEST_NAME}: a.txt rule 2: {message}"):
+        TemplateManifest(tmp_path, {"files": rules})
+
+
+def test_manifest_is_reloaded_when_it_changes(tmp_path):
+    assert manifest(tmp_path, {"a.txt": "a"}, {}).parameterized_files == []
+
+    manifest_path = tmp_path / MANIFEST_NAME
+    manifest_path.write_text(json.dumps({"files": {"a.txt": [{"kind": "replace", "old": "a", "value": "b"}]}}))
+    later = manifest_path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(manifest_path, ns=(later, later))
+    assert load_manifest(tmp_path).parameterized_files == ["a.txt"]
@@ -0,0 +1,33 @@
+import pytest
+
+from workspace import Workspace
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    (tmp_path / "app.js").write_text("let a = 1;\nlet b = 1;\n")
+    return Workspace(str(tmp_path))
+
+
+def test_replace_in_file_replaces_the_expected_number_of_occurrences(workspace, tmp_path):
+    workspace.replace_in_file("app.js", "= 1", "= 2", expected_replacements=2)
+    assert (tmp_path / "app.js").read_text() == "let a = 2;\nlet b = 2;\n"
+
+
+def test_replace_in_file_rejects_a_count_mismatch(workspace, tmp_path):
+    with pytest.raises(ValueError, match="Expected 1 occurrence"):
+        workspace.replace_in_file("app.js", "= 1", "= 2")
+    assert (tmp_path / "app.js").read_text() == "let a = 1;\nlet b = 1;\n"
+
+
+@pytest.mark.parametrize("expected", [0, -1])
+def test_replace_in_file_rejects_expected_replacements_below_one(workspace, tmp_path, expected):
+    with pytest.raises(ValueError, match="at least 1"):
+        workspace.replace_in_file("app.js", "let a", "let c", expected_replacements=expected)
+    assert (tmp_path / "app.js").read_text() == "let a = 1;\nlet b = 1;\n"
+
+
+def test_replace_in_file_defaults_to_one_occurrence(workspace, tmp_path):
+    workspace.replace_in_file("app.js", "let a", "let c", expected_replacements=None)
+    assert (tmp_path / "app.js").read_text() == "let c = 1;\nlet b = 1;\n"
+
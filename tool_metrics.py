@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Opt-in instrumentation for the agent file tools.
+
+When enabled (enable_tool_metrics() or the AM_TOOLS_METRICS environment variable
+pointing at a .jsonl file), every call of an instrumented tool appends one JSON
+record with its wall time, bytes read and written, result size, estimated tokens
+returned and error (if any). Run this module on such a file to see where the time
+and the tokens go:
+
+    python tool_metrics.py logs/run.jsonl --top 10
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Optional
+
+# Rough characters-per-token ratio, same heuristic as the workspace budgets
+CHARS_PER_TOKEN = 4
+
+_io = threading.local()
+
+
+def record_io(bytes_read: int = 0, bytes_written: int = 0):
+    """Account file I/O to the tool call running on this thread (no-op outside a call)."""
+    counters = getattr(_io, 'counters', None)
+    if counters is not None:
+        counters[0] += bytes_read
+        counters[1] += bytes_written
+
+
+class ToolMetricsRecorder:
+    """Appends one JSON line per tool call to a per-run file."""
+
+    def __init__(self, path: str, run_id: Optional[str] = None):
+        """
+        Args:
+            path: JSONL file to append records to (parent directories are created)
+            run_id: Identifier stored in every record (default: a new random id)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+
+    def record(self, entry: dict):
+        line = json.dumps({"run_id": self.run_id, **entry}, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+
+_recorder: Optional[ToolMetricsRecorder] = None
+
+
+def enable_tool_metrics(path: str, run_id: Optional[str] = None) -> ToolMetricsRecorder:
+    """
+    Start recording tool calls of this process to path.
+
+    Args:
+        path: JSONL file for this run
+        run_id: Optional run identifier stored in every record
+
+    Returns:
+        The active recorder
+    """
+    global _recorder
+    _recorder = ToolMetricsRecorder(path, run_id)
+    return _recorder
+
+
+def disable_tool_metrics():
+    """Stop recording tool calls."""
+    global _recorder
+    _recorder = None
+
+
+def current_recorder() -> Optional[ToolMetricsRecorder]:
+    return _recorder
+
+
+def instrument_tool(tool):
+    """
+    Wrap a smolagents tool so its calls are recorded while metrics are enabled.
+
+    The wrapper only checks for an active recorder when metrics are disabled,
+    so instrumented tools cost nothing noticeable by default.
+
+    Args:
+        tool: A smolagents Tool instance (e.g. created with @tool)
+
+    Returns:
+        The same tool, with its forward method wrapped
+    """
+    forward = tool.forward
+
+    @wraps(forward)
+    def instrumented_forward(*args, **kwargs):
+        recorder = _recorder
+        # Nested tool calls are accounted to the outermost call only
+        if recorder is None or getattr(_io, 'counters', None) is not None:
+            return forward(*args, **kwargs)
+
+        _io.counters = [0, 0]
+        started = time.perf_counter()
+        error = None
+        result = None
+        try:
+            result = forward(*args, **kwargs)
+            return result
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            bytes_read, bytes_written = _io.counters
+            _io.counters = None
+            text = result if isinstance(result, str) else ('' if result is None else str(result))
+            recorder.record({
+                "ts": datetime.now().isoformat(timespec='milliseconds'),
+                "tool": tool.name,
+                "args": _summarize_args(args, kwargs),
+                "wall_ms": round(elapsed * 1000, 3),
+                "bytes_read": bytes_read,
+                "bytes_written": bytes_written,
+                "result_chars": len(text),
+                "result_tokens": (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN,
+                "error": error,
+            })
+
+    tool.forward = instrumented_forward
+    return tool
+
+
+def _summarize_args(args: tuple, kwargs: dict) -> dict:
+    """Keep arguments small in the log: long strings are replaced by their length."""
+    summary = {}
+    for key, value in list(enumerate(args)) + list(kwargs.items()):
+        if isinstance(value, str) and len(value) > 120:
+            value = f"<{len(value)} chars>"
+        elif isinstance(value, (list, tuple)) and len(value) > 10:
+            value = f"<{len(value)} items>"
+        summary[str(key)] = value
+    return summary
+
+
+def aggregate(path: str) -> dict:
+    """
+    Aggregate a metrics file per tool.
+
+    Args:
+        path: JSONL file written by ToolMetricsRecorder
+
+    Returns:
+        Mapping tool name -> totals (calls, errors, wall_ms, bytes_read, bytes_written, result_tokens, max_ms)
+    """
+    totals: dict[str, dict] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            stats = totals.setdefault(entry["tool"], {
+                "calls": 0, "errors": 0, "wall_ms": 0.0, "max_ms": 0.0,
+                "bytes_read": 0, "bytes_written": 0, "result_tokens": 0,
+            })
+            stats["calls"] += 1
+            stats["errors"] += 1 if entry.get("error") else 0
+            stats["wall_ms"] += entry["wall_ms"]
+            stats["max_ms"] = max(stats["max_ms"], entry["wall_ms"])
+            stats["bytes_read"] += entry.get("bytes_read", 0)
+            stats["bytes_written"] += entry.get("bytes_written", 0)
+            stats["result_tokens"] += entry.get("result_tokens", 0)
+    return totals
+
+
+def format_report(totals: dict, top: int = 10) -> str:
+    """Render the top tools by total wall time and by tokens returned."""
+    if not totals:
+        return "No tool calls recorded."
+    lines = []
+    header = f"{'tool':<24}{'calls':>7}{'errors':>8}{'total s':>10}{'avg ms':>10}{'max ms':>10}{'tokens':>10}{'read KB':>10}{'written KB':>12}"
+
+    def row(name, s):
+        return (
+            f"{name:<24}{s['calls']:>7}{s['errors']:>8}{s['wall_ms'] / 1000:>10.2f}"
+            f"{s['wall_ms'] / s['calls']:>10.1f}{s['max_ms']:>10.1f}{s['result_tokens']:>10}"
+            f"{s['bytes_read'] / 1024:>10.1f}{s['bytes_written'] / 1024:>12.1f}"
+        )
+
+    for title, key in (("Top tools by wall time", "wall_ms"), ("Top tools by tokens returned", "result_tokens")):
+        lines.append(f"\n{title}:")
+        lines.append(header)
+        ranked = sorted(totals.items(), key=lambda item: item[1][key], reverse=True)[:top]
+        lines.extend(row(name, stats) for name, stats in ranked)
+    return "\n".join(lines).lstrip("\n")
+
+
+# Allow enabling from the environment, e.g. for the Streamlit-launched wrapper subprocess
+if os.environ.get('AM_TOOLS_METRICS'):
+    enable_tool_metrics(os.environ['AM_TOOLS_METRICS'], os.environ.get('AM_TOOLS_METRICS_RUN_ID'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a tool metrics JSONL file")
+    parser.add_argument("path", help="JSONL file written with AM_TOOLS_METRICS / enable_tool_metrics()")
+    parser.add_argument("--top", type=int, default=10, help="Number of tools to show per ranking (default: 10)")
+    cli_args = parser.parse_args()
+    print(format_report(aggregate(cli_args.path), cli_args.top))
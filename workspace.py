@@ -0,0 +1,821 @@
+import difflib
+import hashlib
+import os
+import re
+import threading
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from itertools import islice
+from pathlib import Path
+from typing import Optional
+
+from atomic_io import atomic_write_text
+from code_search import get_search_index, matches_file_pattern, scan_files, search_lines
+from file_cache import file_cache
+from file_transaction import WriteTransaction
+from tool_metrics import record_io
+
+# Default number of lines returned by read_file when no explicit range is given.
+# Keeps very large files from flooding the agent context in one step.
+DEFAULT_READ_MAX_LINES = 2000
+# Default page size for recursive listings
+DEFAULT_LIST_PAGE_SIZE = 200
+# Directory depth at which recursive summaries roll deeper folders up into their ancestor
+SUMMARY_MAX_DEPTH = 3
+# Rough characters-per-token ratio used to turn token budgets into character budgets
+CHARS_PER_TOKEN = 4
+# Upper bound on remembered path resolutions per workspace
+MAX_RESOLVED_PATHS = 4096
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate, good enough for budgeting tool output."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class Workspace:
+    """A sandboxed project directory that the file tools operate on.
+
+    Every path an agent passes in is resolved against root and must stay inside it.
+    Resolutions are remembered, so repeated access to the same files skips the
+    filesystem walk of Path.resolve(). Each workspace also owns its own write
+    transaction, so several projects can be generated in parallel in one process
+    without sharing (or changing) the process working directory.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Args:
+            root: Project directory (default: the current working directory at creation time)
+        """
+        self._root = Path(root).resolve() if root else Path.cwd().resolve()
+        self._resolved: dict[tuple[str, str], Path] = {}
+        self._transaction: Optional[WriteTransaction] = None
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> Path:
+        """Resolved directory all paths are relative to."""
+        return self._root
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self.root)!r})"
+
+    # Path handling
+    def contains(self, path: Path) -> bool:
+        """True if the resolved path is the root or inside it (a real path check, not a string prefix)."""
+        return path.is_relative_to(self.root)
+
+    def resolve(self, relative: str) -> Path:
+        """
+        Resolve a path given by an agent and check it stays inside the workspace.
+
+        Args:
+            relative: Path relative to the workspace root
+
+        Returns:
+            The resolved absolute path
+        """
+        root = self.root
+        key = (str(root), str(relative))
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            # Normalize the path to prevent directory traversal attacks
+            resolved = (root / relative).resolve()
+            # Security check: ensure the resolved path is within the workspace.
+            # is_relative_to compares path components, so '/home/me/project2' is not inside '/home/me/project'
+            if not resolved.is_relative_to(root):
+                raise ValueError(f"Access denied: Path '{relative}' is outside current directory")
+            with self._lock:
+                if len(self._resolved) >= MAX_RESOLVED_PATHS:
+                    self._resolved.clear()
+                self._resolved[key] = resolved
+        return resolved
+
+    def relative(self, path: Path) -> Path:
+        """Path relative to the workspace root, as shown to agents."""
+        return path.relative_to(self.root)
+
+    # Write transactions
+    def active_transaction(self) -> Optional[WriteTransaction]:
+        """Return the transaction writes in this workspace are currently routed to, if any."""
+        return self._transaction
+
+    @contextmanager
+    def write_transaction(self):
+        """
+        Route all writes in this workspace into one transaction for the duration of the block.
+
+        The staged files are committed when the block exits normally and rolled back
+        when it raises, so a failed agent run never leaves a half-updated folder behind.
+
+        Yields:
+            The active WriteTransaction
+        """
+        transaction = WriteTransaction(self.root)
+        with self._lock:
+            if self._transaction is not None:
+                raise RuntimeError("A write transaction is already active in this workspace")
+            self._transaction = transaction
+        try:
+            with transaction:
+                yield transaction
+        finally:
+            with self._lock:
+                self._transaction = None
+
+    def _staged_text(self, target_path: Path) -> Optional[str]:
+        """Content written to target_path in the active write transaction, if any."""
+        transaction = self._transaction
+        if transaction is None:
+            return None
+        return transaction.staged_text(target_path)
+
+    def _current_text(self, target_path: Path) -> Optional[str]:
+        """The content an agent should see: staged writes first, then the shared cache."""
+        staged = self._staged_text(target_path)
+        if staged is not None:
+            return staged
+        return file_cache.get_text(target_path)
+
+    def _staged_glob(self, base_dir: Path, pattern: str) -> dict[Path, int]:
+        """Files staged in the active transaction under base_dir that match pattern, with their sizes."""
+        transaction = self._transaction
+        if transaction is None:
+            return {}
+        pattern_parts = tuple(Path(pattern).parts)
+        return {
+            target: size
+            for target, size in transaction.staged_files().items()
+            if target.is_relative_to(base_dir) and _glob_match(target.relative_to(base_dir).parts, pattern_parts)
+        }
+
+    def _existing_text(self, target_path: Path) -> Optional[str]:
+        """Current (staged or on-disk) text of target_path, or None if there is no such text file."""
+        staged = self._staged_text(target_path)
+        if staged is not None:
+            return staged
+        if not target_path.is_file():
+            return None
+        try:
+            text = file_cache.get_text(target_path)
+            if text is None:
+                with open(target_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+        except UnicodeDecodeError:
+            return None
+        return text
+
+    def _write_text(self, target_path: Path, content: str, mode: str = 'w'):
+        """Write through the active transaction when there is one, otherwise straight to disk."""
+        transaction = self._transaction
+        if transaction is not None and target_path.is_relative_to(transaction.root):
+            transaction.stage(target_path, content, mode)
+            record_io(bytes_written=len(content.encode('utf-8')))
+            return
+        # Create parent directories if they don't exist
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        if _is_shared_file(target_path):
+            # Hardlinked to a template (see fast_copy): writing in place would change the template too
+            _replace_file(target_path, content, mode)
+        else:
+            with open(target_path, mode, encoding='utf-8') as f:
+                f.write(content)
+        record_io(bytes_written=len(content.encode('utf-8')))
+        # Make sure no agent reads a stale cached copy of this file or its directory listing
+        file_cache.invalidate(target_path)
+
+    # File operations (the tools in am_tools are thin wrappers around these)
+    def read_file(
+        self,
+        filepath: str,
+        start_line: Optional[int] = None,
+        max_lines: Optional[int] = None,
+        byte_offset: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> str:
+        """Read a whole file or a line/byte window of it; see am_tools.read_file."""
+        target_path = self.resolve(filepath)
+
+        # Files written in the active transaction are not on disk yet
+        staged = self._staged_text(target_path)
+        if staged is None:
+            # Existing check: Check if the file exists
+            if not target_path.exists():
+                raise FileNotFoundError(f"File not found: {filepath}")
+
+            # Type check: check if the path is a file
+            if not target_path.is_file():
+                raise ValueError(f"Path is not a file: {filepath}")
+
+        # Byte-window mode: seek straight to the offset instead of scanning lines
+        if start_line is None and (byte_offset is not None or max_bytes is not None):
+            byte_offset = byte_offset or 0
+            if byte_offset < 0:
+                raise ValueError("byte_offset must be >= 0")
+            staged_bytes = staged.encode('utf-8') if staged is not None else None
+            if max_bytes is None:
+                max_bytes = len(staged_bytes) if staged_bytes is not None else target_path.stat().st_size
+                max_bytes = max(max_bytes, 1)
+            if max_bytes < 1:
+                raise ValueError("max_bytes must be >= 1")
+            if staged_bytes is not None:
+                text, next_offset, has_more = _decode_byte_window(
+                    staged_bytes[byte_offset:byte_offset + max_bytes], byte_offset, len(staged_bytes)
+                )
+            else:
+                text, next_offset, has_more = _read_byte_window(target_path, byte_offset, max_bytes)
+            if has_more:
+                text += (
+                    f"\n\n[... truncated at byte {next_offset} of {filepath}; "
+                    f"call read_file('{filepath}', byte_offset={next_offset}, max_bytes={max_bytes}) to continue ...]"
+                )
+            return text
+
+        # Line-window mode (the default): stream only the requested lines
+        start_line = start_line or 1
+        max_lines = max_lines or DEFAULT_READ_MAX_LINES
+        if start_line < 1:
+            raise ValueError("start_line must be >= 1")
+        if max_lines < 1:
+            raise ValueError("max_lines must be >= 1")
+
+        # Small files are served from the shared cache; large ones are streamed from disk
+        cached_text = staged if staged is not None else file_cache.get_text(target_path)
+        if cached_text is not None:
+            lines = cached_text.splitlines(keepends=True)
+            text = ''.join(lines[start_line - 1:start_line - 1 + max_lines])
+            has_more = len(lines) > start_line - 1 + max_lines
+        else:
+            text, has_more = _read_line_window(target_path, start_line, max_lines)
+        if has_more:
+            next_line = start_line + max_lines
+            if not text.endswith('\n'):
+                text += '\n'
+            text += (
+                f"\n[... truncated: showing lines {start_line}-{next_line - 1} of {filepath}; "
+                f"call read_file('{filepath}', start_line={next_line}, max_lines={max_lines}) to continue ...]"
+            )
+        return text
+
+    def write_file(self, filepath: str, content: str, mode: Optional[str] = 'w') -> str:
+        """Write or append to a file; see am_tools.write_file."""
+        # Only allow 'w' (write/overwrite) or 'a' (append) modes
+        if mode not in ['w', 'a']:
+            raise ValueError("Mode must be 'w' (write/overwrite) or 'a' (append)")
+
+        target_path = self.resolve(filepath)
+
+        if mode == 'a':
+            if not content:
+                return f"No changes: nothing to append to {filepath} (write skipped)"
+            self._write_text(target_path, content, mode)
+            return f"Successfully appended to file: {filepath} (+{_count_lines(content)} lines appended)"
+
+        previous = self._existing_text(target_path)
+        # Identical content: skip the write so the mtime (and every cache keyed on it) stays valid
+        if previous is not None and _content_digest(previous) == _content_digest(content):
+            return f"No changes: {filepath} already has this content (write skipped)"
+
+        # Write the content to the file (parent directories are created as needed)
+        # 在保存文件前，自动把存放它的各级文件夹都建好，而且不怕重复建。
+        # Inside a write transaction the content is staged and only lands on disk when the run succeeds.
+        self._write_text(target_path, content, mode)
+
+        # Summarize what changed so the agent doesn't need to read the file back
+        if previous is None:
+            return f"Successfully written to file: {filepath} (new file, {_count_lines(content)} lines)"
+        return f"Successfully written to file: {filepath} ({_diff_summary(previous, content)})"
+
+    def replace_in_file(
+        self,
+        filepath: str,
+        old_string: str,
+        new_string: str,
+        expected_replacements: Optional[int] = 1,
+    ) -> str:
+        """Replace a snippet of a file in place; see am_tools.replace_in_file."""
+        if not old_string:
+            raise ValueError("old_string must not be empty; use write_file to create or overwrite a file")
+        if old_string == new_string:
+            raise ValueError("old_string and new_string are identical; nothing to replace")
+        if expected_replacements is None:
+            expected_replacements = 1
+        elif expected_replacements < 1:
+            raise ValueError(
+                f"expected_replacements must be at least 1, got {expected_replacements}; "
+                "use read_file or search_code to check that a snippet is absent"
+            )
+
+        target_path = self.resolve(filepath)
+
+        content = self._staged_text(target_path)
+        if content is None:
+            if not target_path.exists():
+                raise FileNotFoundError(f"File not found: {filepath}")
+            if not target_path.is_file():
+                raise ValueError(f"Path is not a file: {filepath}")
+            content = file_cache.get_text(target_path)
+        if content is None:
+            with open(target_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            record_io(bytes_read=len(content.encode('utf-8')))
+
+        # 1. Exact literal match
+        spans = []
+        start = content.find(old_string)
+        while start != -1:
+            spans.append((start, start + len(old_string)))
+            start = content.find(old_string, start + len(old_string))
+        match_mode = "exact match"
+
+        # 2. Fallback: same text, but whitespace may differ
+        if not spans:
+            spans = _find_whitespace_tolerant_matches(content, old_string)
+            match_mode = "whitespace-tolerant match"
+
+        if not spans:
+            raise ValueError(
+                f"Text to replace not found in {filepath}.{_closest_line_hint(content, old_string)} "
+                "Use read_file to check the current content and copy old_string exactly."
+            )
+        if len(spans) != expected_replacements:
+            raise ValueError(
+                f"Expected {expected_replacements} occurrence(s) of old_string in {filepath}, found {len(spans)} "
+                f"({match_mode}). Add more surrounding context to old_string or set expected_replacements."
+            )
+
+        # Rebuild the content from the untouched pieces and the replacements
+        pieces = []
+        last_end = 0
+        for span_start, span_end in spans:
+            pieces.append(content[last_end:span_start])
+            pieces.append(new_string)
+            last_end = span_end
+        pieces.append(content[last_end:])
+        new_content = ''.join(pieces)
+
+        self._write_text(target_path, new_content)
+
+        line_numbers = ", ".join(str(content.count('\n', 0, span_start) + 1) for span_start, _ in spans)
+        return f"Successfully replaced {len(spans)} occurrence(s) in {filepath} ({match_mode}) at line(s) {line_numbers}"
+
+    def list_files(
+        self,
+        directory: Optional[str] = '.',
+        pattern: Optional[str] = '*',
+        recursive: Optional[bool] = False,
+        page_size: Optional[int] = None,
+        cursor: Optional[str] = None,
+        summary: Optional[bool] = False,
+        include_ignored: Optional[bool] = False,
+    ) -> str:
+        """List files of a directory, recursively or as a summary; see am_tools.list_files."""
+        directory = directory or '.'
+        target_dir = self.resolve(directory)
+
+        # Existing check: Check if the directory exists
+        if not target_dir.exists():
+            raise FileNotFoundError(f"Directory not found: {directory}")
+
+        # Type check: check if the path is a directory
+        if not target_dir.is_dir():
+            raise ValueError(f"Path is not a directory: {directory}")
+
+        pattern = pattern or '*'
+        if summary:
+            return _summarize_tree(target_dir, directory, pattern, bool(include_ignored))
+        if recursive:
+            page_size = page_size or DEFAULT_LIST_PAGE_SIZE
+            try:
+                offset = int(cursor) if cursor else 0
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor!r}; pass the cursor returned by the previous call")
+            if page_size < 1 or offset < 0:
+                raise ValueError("page_size must be >= 1 and cursor must not be negative")
+            return self._list_files_recursive(
+                target_dir, directory, pattern, page_size, offset, bool(include_ignored)
+            )
+
+        root = self.root
+        # Files written in the active transaction are listed with their staged size
+        staged = self._staged_glob(target_dir, pattern)
+
+        def matching_files() -> list[str]:
+            # Find all matching files
+            return [file.name for file in sorted(target_dir.glob(pattern)) if file.is_file()]
+
+        # Recursive patterns can match files in subdirectories, whose changes don't bump the
+        # mtime of target_dir, so only single-level listings are safe to cache. Only the names
+        # are cached; sizes are read on every call since files can change in place.
+        if staged or '**' in pattern or '/' in pattern or os.sep in pattern:
+            files = {file for file in target_dir.glob(pattern) if file.is_file()} | set(staged)
+        else:
+            names = file_cache.get_listing(target_dir, f"{root}|{pattern}", matching_files)
+            files = {target_dir / name for name in names}
+
+        # If no files match the pattern, return a message
+        if not files:
+            return f"No files matching pattern '{pattern}' in {directory}"
+
+        # Format the file list
+        file_list = []
+        for file in sorted(files):
+            try:
+                # stat stands for status, and st stands for struct
+                size = staged[file] if file in staged else file.stat().st_size
+            except FileNotFoundError:
+                continue
+            relative_path = file.relative_to(root)
+            # "  - data\file.txt (123 bytes)"
+            # \n usage
+            file_list.append(f"  - {relative_path} ({size} bytes)")
+
+        return f"Files in {directory}:\n" + "\n".join(file_list)
+
+    def _list_files_recursive(
+        self,
+        target_dir: Path,
+        directory: str,
+        pattern: str,
+        page_size: int,
+        offset: int,
+        include_ignored: bool,
+    ) -> str:
+        """One page of a recursive os.scandir listing, with a cursor for the next page."""
+        staged = self._staged_glob(target_dir, '**/*')
+        entries = (
+            (relative, entry) for relative, entry in scan_files(target_dir, ignore_dirs=not include_ignored)
+            if matches_file_pattern(relative, pattern)
+        )
+        # Stream only up to the end of the requested page (+1 to know whether more follow)
+        page = list(islice(entries, offset, offset + page_size + 1))
+        has_more = len(page) > page_size
+        page = page[:page_size]
+
+        file_list = []
+        listed = set()
+        for relative, entry in page:
+            path = Path(entry.path)
+            listed.add(path)
+            # DirEntry caches its stat result, so this is the only stat for this entry
+            size = staged[path] if path in staged else entry.stat().st_size
+            file_list.append(f"  - {self.relative(path).as_posix()} ({size} bytes)")
+        if not has_more:
+            # New files that only exist in the active transaction go on the last page
+            for path in sorted(set(staged) - listed):
+                relative = path.relative_to(target_dir).as_posix()
+                if not path.exists() and matches_file_pattern(relative, pattern):
+                    file_list.append(f"  - {self.relative(path).as_posix()} ({staged[path]} bytes)")
+
+        if not file_list:
+            return f"No files matching pattern '{pattern}' in {directory}"
+        header = f"Files in {directory} (recursive, entries {offset + 1}-{offset + len(file_list)}):"
+        result = header + "\n" + "\n".join(file_list)
+        if has_more:
+            next_cursor = offset + page_size
+            result += (
+                f"\n[More files: call list_files('{directory}', pattern='{pattern}', recursive=True, "
+                f"page_size={page_size}, cursor='{next_cursor}') to continue]"
+            )
+        return result
+
+    def read_many_files(self, paths: list[str], max_tokens: Optional[int] = 20000) -> str:
+        """Read several files under a total token budget; see am_tools.read_many_files."""
+        root = self.root
+        budget = (max_tokens or 20000) * CHARS_PER_TOKEN
+
+        # Expand patterns in priority order, keeping the first occurrence of each file
+        targets = []
+        seen = set()
+        missing = []
+        for entry in paths:
+            if any(ch in entry for ch in '*?['):
+                matches = sorted({p for p in root.glob(entry) if p.is_file()} | set(self._staged_glob(root, entry)))
+            else:
+                matches = [root / entry]
+            if not matches:
+                missing.append(entry)
+            for match in matches:
+                target_path = match.resolve()
+                # Security check: ensure the resolved path is within the workspace
+                if not self.contains(target_path):
+                    raise ValueError(f"Access denied: Path '{entry}' is outside current directory")
+                if target_path not in seen:
+                    seen.add(target_path)
+                    targets.append(target_path)
+
+        sections = []
+        notes = [f"Not found: {entry}" for entry in missing]
+        for index, target_path in enumerate(targets):
+            relative_path = self.relative(target_path)
+            staged = self._staged_text(target_path)
+            if staged is None and not target_path.exists():
+                notes.append(f"Not found: {relative_path}")
+                continue
+            if staged is None and not target_path.is_file():
+                notes.append(f"Not a file: {relative_path}")
+                continue
+            if budget <= 0:
+                notes.extend(f"Skipped (budget exhausted): {self.relative(p)}" for p in targets[index:])
+                break
+
+            header = f"--- {relative_path} ---\n"
+            try:
+                text = staged if staged is not None else file_cache.get_text(target_path)
+                if text is None:
+                    # Too large for the cache: only read as much as could possibly fit
+                    with open(target_path, 'r', encoding='utf-8') as f:
+                        text = f.read(budget + 1)
+                    record_io(bytes_read=len(text.encode('utf-8')))
+            except UnicodeDecodeError:
+                notes.append(f"Skipped (not UTF-8 text): {relative_path}")
+                continue
+
+            available = budget - len(header)
+            if len(text) > available:
+                # Cut at a line boundary and tell the agent where to continue
+                cut = text.rfind('\n', 0, max(available, 0)) + 1
+                shown = text[:cut]
+                next_line = shown.count('\n') + 1
+                text = shown + f"[... truncated; call read_file('{relative_path}', start_line={next_line}) for the rest ...]\n"
+                notes.append(f"Truncated: {relative_path} (from line {next_line})")
+                budget = 0
+            else:
+                budget -= len(header) + len(text)
+            sections.append(header + text)
+
+        result = "\n".join(sections) if sections else "No files read."
+        if notes:
+            result += "\n\n" + "\n".join(notes)
+        return result
+
+    def search_code(
+        self,
+        query: str,
+        directory: Optional[str] = '.',
+        file_pattern: Optional[str] = None,
+        regex: Optional[bool] = False,
+        context_lines: Optional[int] = 2,
+        max_results: Optional[int] = 50,
+    ) -> str:
+        """Search project files and return matching lines with context; see am_tools.search_code."""
+        if not query:
+            raise ValueError("query must not be empty")
+        context_lines = max(context_lines or 0, 0)
+        max_results = max_results or 50
+        directory = directory or '.'
+
+        target_dir = self.resolve(directory)
+        if not target_dir.is_dir():
+            raise FileNotFoundError(f"Directory not found: {directory}")
+        if regex:
+            try:
+                re.compile(query)
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression '{query}': {e}")
+
+        # Bring the token index up to date (only changed files are re-read) and
+        # use it to skip every file that cannot contain the query
+        index = get_search_index(target_dir)
+        index.refresh()
+        candidates = set(index.indexed_files() if regex else index.candidates(query))
+        # Files staged in the active transaction are searched with their staged content
+        candidates |= {p.relative_to(target_dir).as_posix() for p in self._staged_glob(target_dir, '**/*')}
+
+        blocks = []
+        total = 0
+        truncated = False
+        for relative in sorted(candidates):
+            if not matches_file_pattern(relative, file_pattern):
+                continue
+            target_path = target_dir / relative
+            try:
+                text = self._current_text(target_path)
+            except (UnicodeDecodeError, OSError):
+                continue
+            if not text:
+                continue
+            hits = search_lines(text, query, regex=bool(regex))
+            if not hits:
+                continue
+
+            lines = text.splitlines()
+            display_path = self.relative(target_path).as_posix()
+            hit_set = set(hits)
+            last_shown = -1
+            block = []
+            for hit in hits:
+                if total >= max_results:
+                    truncated = True
+                    break
+                total += 1
+                start = max(hit - context_lines, last_shown + 1)
+                end = min(hit + context_lines + 1, len(lines))
+                if block and start > last_shown + 1:
+                    block.append("--")
+                for i in range(start, end):
+                    # ':' marks a matching line, '-' a context line (like grep)
+                    separator = ':' if i in hit_set else '-'
+                    block.append(f"{display_path}{separator}{i + 1}{separator} {lines[i][:300]}")
+                last_shown = max(last_shown, end - 1)
+            blocks.append("\n".join(block))
+            if truncated:
+                break
+
+        if not blocks:
+            return f"No matches for '{query}' in {directory}"
+        header = f"Found {total} matching line(s) for '{query}' in {len(blocks)} file(s)"
+        if truncated:
+            header += f" (stopped at max_results={max_results}; narrow the query or file_pattern)"
+        return header + ":\n" + "\n\n".join(blocks)
+
+    def mkdir(self, directory: str, parents: Optional[bool] = True, exist_ok: Optional[bool] = True) -> str:
+        """Create a directory inside the workspace; see am_tools.mkdir."""
+        target_dir = self.resolve(directory)
+
+        # Check if directory already exists
+        if target_dir.exists():
+            if not exist_ok:
+                raise FileExistsError(f"Directory already exists: {directory}")
+            if not target_dir.is_dir():
+                raise ValueError(f"Path exists but is not a directory: {directory}")
+            return f"Directory already exists: {directory}"
+
+        # Create the directory
+        try:
+            target_dir.mkdir(parents=parents, exist_ok=exist_ok)
+            file_cache.invalidate(target_dir)
+            return f"Successfully created directory: {directory}"
+        except FileNotFoundError:
+            if not parents:
+                raise FileNotFoundError(f"Parent directory doesn't exist. Set parents=True to create parent directories: {directory}")
+            raise
+
+
+class CurrentDirectoryWorkspace(Workspace):
+    """Workspace that follows the process working directory, as the original tools did.
+
+    Used for the module-level tools in am_tools so existing scripts that chdir()
+    into a project keep working unchanged.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._root = None
+
+    @property
+    def root(self) -> Path:
+        return Path.cwd().resolve()
+
+
+def _is_shared_file(path: Path) -> bool:
+    """True if path is a regular file with more than one hard link."""
+    try:
+        return path.stat().st_nlink > 1
+    except FileNotFoundError:
+        return False
+
+
+def _replace_file(path: Path, content: str, mode: str):
+    """Write content to a new inode and rename it over path, leaving other links untouched."""
+    if mode == 'a':
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read() + content
+    atomic_write_text(path, content, mode_from=path)
+
+
+def _read_line_window(target_path: Path, start_line: int, max_lines: int) -> tuple[str, bool]:
+    """Stream lines [start_line, start_line + max_lines) without loading the whole file.
+
+    Returns the text of the window and whether more lines follow it.
+    """
+    with open(target_path, 'r', encoding='utf-8') as f:
+        # islice skips the leading lines lazily, one line in memory at a time
+        window = list(islice(f, start_line - 1, start_line - 1 + max_lines))
+        # Peek a single line to know whether a continuation marker is needed
+        has_more = f.readline() != ''
+    text = ''.join(window)
+    record_io(bytes_read=len(text.encode('utf-8')))
+    return text, has_more
+
+
+def _read_byte_window(target_path: Path, byte_offset: int, max_bytes: int) -> tuple[str, int, bool]:
+    """Seek to byte_offset and read at most max_bytes.
+
+    The window is shrunk so it never ends in the middle of a UTF-8 sequence.
+    Returns the decoded text, the offset just past the window and whether more bytes follow.
+    """
+    file_size = target_path.stat().st_size
+    with open(target_path, 'rb') as f:
+        f.seek(byte_offset)
+        data = f.read(max_bytes)
+    record_io(bytes_read=len(data))
+    return _decode_byte_window(data, byte_offset, file_size)
+
+
+def _decode_byte_window(data: bytes, byte_offset: int, total_size: int) -> tuple[str, int, bool]:
+    """Decode a byte window that starts at byte_offset of a total_size byte file."""
+    end = byte_offset + len(data)
+    if end < total_size:
+        # Drop a trailing partial multi-byte character; the next window starts at it
+        text = data.decode('utf-8', errors='ignore')
+        consumed = len(text.encode('utf-8'))
+        if consumed:
+            end = byte_offset + consumed
+        else:
+            # Window smaller than one character: return it as-is so reading always advances
+            text = data.decode('utf-8', errors='replace')
+    else:
+        text = data.decode('utf-8', errors='replace')
+    return text, end, end < total_size
+
+
+def _content_digest(text: str) -> str:
+    """Hash used to detect writes that would not change a file."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _count_lines(text: str) -> int:
+    return len(text.splitlines())
+
+
+def _diff_summary(old: str, new: str, max_regions: int = 5) -> str:
+    """Compact description of a rewrite: lines added/removed and the changed line ranges of the new file."""
+    old_lines = old.splitlines()
+    new_lines = new.splitlines()
+    added = removed = 0
+    regions = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        removed += i2 - i1
+        added += j2 - j1
+        if j2 > j1:
+            regions.append(f"{j1 + 1}-{j2}" if j2 - j1 > 1 else f"{j1 + 1}")
+        else:
+            # Pure deletion: point at the line that now follows the removed block
+            regions.append(f"{j1 + 1} (deleted {i2 - i1})")
+    if not regions:
+        # Only line endings or a trailing newline changed
+        return "whitespace-only change"
+    shown = ", ".join(regions[:max_regions])
+    if len(regions) > max_regions:
+        shown += f", ... ({len(regions) - max_regions} more)"
+    return f"+{added} -{removed} lines; changed lines {shown}"
+
+
+def _glob_match(parts: tuple, pattern_parts: tuple) -> bool:
+    """Match path segments against glob segments, where '**' spans any number of segments."""
+    if not pattern_parts:
+        return not parts
+    if pattern_parts[0] == '**':
+        return _glob_match(parts, pattern_parts[1:]) or (bool(parts) and _glob_match(parts[1:], pattern_parts))
+    return bool(parts) and fnmatch(parts[0], pattern_parts[0]) and _glob_match(parts[1:], pattern_parts[1:])
+
+
+def _find_whitespace_tolerant_matches(content: str, old_string: str) -> list[tuple[int, int]]:
+    """Find spans of content equal to old_string when any run of whitespace may differ."""
+    tokens = old_string.split()
+    if not tokens:
+        return []
+    pattern = r'\s+'.join(re.escape(token) for token in tokens)
+    return [(m.start(), m.end()) for m in re.finditer(pattern, content)]
+
+
+def _closest_line_hint(content: str, old_string: str) -> str:
+    """Point the agent at the line most similar to the first line it searched for."""
+    first_line = next((line.strip() for line in old_string.splitlines() if line.strip()), '')
+    lines = [line.strip() for line in content.splitlines()]
+    close = difflib.get_close_matches(first_line, lines, n=1, cutoff=0.6)
+    if not close:
+        return ""
+    line_number = lines.index(close[0]) + 1
+    return f" Closest match is line {line_number}: {close[0]!r}"
+
+
+def _summarize_tree(target_dir: Path, directory: str, pattern: str, include_ignored: bool) -> str:
+    """Aggregate file counts and sizes per directory instead of listing every file."""
+    totals: dict[str, list[int]] = {}
+    for relative, entry in scan_files(target_dir, ignore_dirs=not include_ignored):
+        if not matches_file_pattern(relative, pattern):
+            continue
+        size = entry.stat().st_size
+        parts = relative.split('/')[:-1][:SUMMARY_MAX_DEPTH]
+        # Count the file in the root and in every ancestor up to the depth limit
+        for depth in range(len(parts) + 1):
+            key = '/'.join(parts[:depth])
+            counts = totals.setdefault(key, [0, 0])
+            counts[0] += 1
+            counts[1] += size
+
+    if not totals:
+        return f"No files matching pattern '{pattern}' in {directory}"
+    lines = []
+    for key in sorted(totals):
+        count, size = totals[key]
+        depth = key.count('/') + 1 if key else 0
+        name = (key.rsplit('/', 1)[-1] + '/') if key else f"{directory}/"
+        lines.append(f"{'  ' * depth}{name} ({count} files, {size} bytes)")
+    return f"Directory summary for {directory} (pattern '{pattern}'):\n" + "\n".join(lines)